@@ -0,0 +1,3 @@
+from dockerctl.cli import main
+
+main()
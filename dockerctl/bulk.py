@@ -0,0 +1,147 @@
+from dockerctl.container import Container, PORT_CONFLICT_STOP_FIRST
+from dockerctl.container_config import ContainerConfig
+from dockerctl.exceptions import ContainerException
+from dockerctl.pull import PullPlanner
+from dockerctl.scheduler import DependencyGraph
+from dockerctl.snapshot import CONFIG_HASH_LABEL, labels
+from dockerctl.utils import DEFAULT_JOBS
+import fnmatch
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def select_names(patterns, all=False):
+    """ Return the names of the configs matching any of the glob `patterns` """
+    available = ContainerConfig.cache().names()
+    if all:
+        return available
+
+    names = []
+    for pattern in patterns:
+        matches = fnmatch.filter(available, pattern)
+        if not matches:
+            raise ContainerException('No container matches %s' % pattern)
+        names.extend(name for name in matches if name not in names)
+
+    return names
+
+
+class BulkOperation(object):
+    """ Starts, stops or restarts many containers on a bounded worker pool
+
+    All containers share one client and one snapshot. Dependencies are
+    respected through a `DependencyGraph`, and a failing container doesn't
+    abort the others: every method returns a dict mapping the names of
+    failed containers to their exceptions.
+    """
+
+    def __init__(self, docker_client, snapshot, jobs=DEFAULT_JOBS):
+        self.client = docker_client
+        self.snapshot = snapshot
+        self.jobs = jobs
+        self.puller = PullPlanner(docker_client, jobs=jobs)
+
+    def start(self, names):
+        graph = DependencyGraph.for_names(names)
+        self.snapshot.prefetch_for(graph.configs)
+        selected = set(names)
+
+        def start(name):
+            container = self._container(graph, name)
+            if name in selected and container.is_running():
+                # like an unselected dependency, a running container is fine
+                logger.info('%s is already running' % name)
+            elif name in selected:
+                logger.info('Starting %s' % name)
+                container_id = container.start(with_depends=False)
+                container.wait_until_ready(container_id)
+            else:
+                container.ensure_started()
+
+        return graph.run(start, jobs=self.jobs, keep_going=True)
+
+    def stop(self, names, with_dependents=False):
+        if with_dependents:
+            graph = DependencyGraph(ContainerConfig.available())
+            self.snapshot.prefetch()
+            dependents = set().union(*[graph.dependents(name) for name in names])
+            names = set(names).union(name for name in dependents if self._container(graph, name).is_running())
+        else:
+            graph = DependencyGraph.for_names(names)
+            self.snapshot.prefetch_for(names)
+
+        def stop(name):
+            container = self._container(graph, name)
+            if not container.is_running():
+                # like `start` of a running container, there is nothing to do
+                logger.info('%s is not running' % name)
+            else:
+                logger.info('Stopping %s' % name)
+                container.stop()
+
+        return graph.run(stop, names, reverse=True, jobs=self.jobs, keep_going=True)
+
+    def restart(self, names, handover=False, port_conflict=PORT_CONFLICT_STOP_FIRST):
+        if handover:
+            return self.handover(names, port_conflict)
+
+        failures = self.stop(names)
+        failures.update(self.start([name for name in names if name not in failures]))
+
+        return failures
+
+    def handover(self, names, port_conflict=PORT_CONFLICT_STOP_FIRST):
+        graph = DependencyGraph.for_names(names)
+        self.snapshot.prefetch_for(graph.configs)
+
+        def handover(name):
+            logger.info('Handing over %s' % name)
+            self._container(graph, name).handover(port_conflict)
+
+        return graph.run(handover, names, jobs=self.jobs, keep_going=True)
+
+    def apply(self, names):
+        """ Bring the containers in line with their configs
+
+        Containers whose config hash differs from the one they were started
+        with are restarted, together with their running dependents, and
+        containers that aren't running are started. All of this is decided
+        from a single listing, so nothing else happens if nothing changed.
+        """
+        graph = DependencyGraph(ContainerConfig.available())
+        self.snapshot.prefetch()
+
+        changed, missing = set(), set()
+        for name in names:
+            running = self._container(graph, name).get_running_container_by_image_name(name)
+            if running is None:
+                missing.add(name)
+            elif labels(running).get(CONFIG_HASH_LABEL) != graph.configs[name].config_hash():
+                changed.add(name)
+
+        restart = set(changed)
+        for name in changed:
+            restart.update(dependent for dependent in graph.dependents(name)
+                           if self._container(graph, dependent).is_running())
+
+        for name in sorted(restart):
+            logger.info('Restarting %s: %s' % (name, 'configuration changed' if name in changed else 'dependency changed'))
+        for name in sorted(missing):
+            logger.info('Starting %s: not running' % name)
+        if not restart and not missing:
+            logger.info('Nothing to do')
+            return {}
+
+        failures = self.stop(sorted(restart)) if restart else {}
+        failures.update(self.start(sorted(name for name in restart | missing if name not in failures)))
+
+        return failures
+
+    def pull(self, names):
+        configs = [ContainerConfig(name) for name in names]
+
+        return self.puller.pull([(config['image'], config.get('pull_ttl', 0)) for config in configs])
+
+    def _container(self, graph, name):
+        return Container(graph.configs[name], self.client, self.snapshot, self.puller)
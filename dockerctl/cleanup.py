@@ -0,0 +1,79 @@
+from dockerctl.container_config import ContainerConfig
+from dockerctl.exceptions import ClientException
+from dockerctl.profiling import span
+from dockerctl.snapshot import CONFIG_LABEL, labels
+from dockerctl.utils import parallel_map, DEFAULT_JOBS
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEEP = 1
+
+
+def exited_containers(snapshot, keep=DEFAULT_KEEP):
+    """ Return the exited containers of all configs except the `keep` most
+    recently created ones of each config, from one listing
+
+    Only containers labelled by dockerctl are considered: a name like
+    `web-backup` doesn't tell whether dockerctl created the container.
+    """
+    snapshot.prefetch()
+
+    garbage = []
+    for name in ContainerConfig.cache().names():
+        exited = [c for c in snapshot.containers(name, only_running=False)
+                  if c['Status'] == 'EXITED' and labels(c).get(CONFIG_LABEL) == name]
+        exited.sort(key=lambda c: c.get('Created', 0), reverse=True)
+        garbage.extend((name, container) for container in exited[keep:])
+
+    return garbage
+
+
+def collect_garbage(docker_client, snapshot, keep=DEFAULT_KEEP, jobs=DEFAULT_JOBS):
+    """ Remove exited containers, keeping the `keep` most recent ones of
+    each config, on a pool of at most `jobs` worker threads
+
+    Returns the ids of the removed containers.
+    """
+    def remove(name_and_container):
+        name, container = name_and_container
+        logger.info('Removing exited %s container %s' % (name, container['Id']))
+        try:
+            docker_client.remove_container(container['Id'])
+        except ClientException as ex:
+            logger.warn('Could not remove container %s: %s' % (container['Id'], ex))
+            return None
+        return container['Id']
+
+    with span('gc.collect'):
+        garbage = exited_containers(snapshot, keep)
+        removed = [container_id for container_id in parallel_map(remove, garbage, jobs) if container_id]
+        for name in set(name for name, _ in garbage):
+            snapshot.invalidate(name)
+
+    return removed
+
+
+def collect_periodically(docker_client, snapshot, interval, keep=DEFAULT_KEEP, jobs=DEFAULT_JOBS, lock=None):
+    """ Run `collect_garbage` every `interval` seconds in a daemon thread,
+    holding `lock` if given
+
+    Returns an event that stops the thread when set.
+    """
+    stopped = threading.Event()
+    lock = lock or threading.Lock()
+
+    def collect():
+        while not stopped.wait(interval):
+            try:
+                with lock:
+                    collect_garbage(docker_client, snapshot, keep, jobs)
+            except Exception:
+                logger.exception('Garbage collection failed')
+
+    thread = threading.Thread(target=collect, name='gc')
+    thread.daemon = True
+    thread.start()
+
+    return stopped
@@ -0,0 +1,335 @@
+# Keep the imports at module level light: they are paid by every
+# invocation, including `--help` and commands forwarded to a server. The
+# docker backends and the modules a command needs are imported when used.
+from dockerctl.exceptions import ContainerException
+from dockerctl.utils import parse_since, DEFAULT_JOBS
+from dockerctl import server
+import argparse
+import logging
+import subprocess
+import sys
+try:
+    from dockerctl.version import version
+except ImportError:
+    version = 'DEV'
+
+logger = logging.getLogger()
+
+cmd_help = '''
+    start       start containers
+    stop        stop containers
+    restart     restart containers
+    apply       restart containers whose configuration changed and start missing ones
+    pull        pull the images of containers
+    gc          remove exited containers
+    status      show status of container
+    logs        show logs of containers, merged by time if there are several
+    stats       show the resource usage of containers, summed up per container
+    exec        execute the command given with -c in the running container
+    shell       start a shell in the running container
+    serve       keep running and execute commands sent by other dockerctl processes
+    help        show this help message'''
+
+# commands that are executed by a running `dockerctl serve` if there is one
+FORWARDED_COMMANDS = ('start', 'stop', 'restart', 'apply', 'gc', 'status')
+
+# bash if the image has it, sh otherwise
+SHELL_COMMAND = ['/bin/sh', '-c', 'if [ -x /bin/bash ]; then exec /bin/bash; else exec /bin/sh; fi']
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='dockerctl',
+        description='Control configured Docker containers.',
+        epilog='This is dockerctl version %s. See https://github.com/fqxp/dockerfiles for more info.' % version)
+    parser.add_argument('-a', '--all', action='store_true', help='start, stop, restart, pull, logs: all configured containers')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debugging')
+    parser.add_argument('-C', '--use-cmdline-client', action='store_true', help='User docker command instead of API directly')
+    parser.add_argument('-S', '--use-socket-client', action='store_true', help='talk to the docker daemon on its unix socket without docker-py')
+    parser.add_argument('--docker-socket', default='/var/run/docker.sock', help='-S: unix socket of the docker daemon (default: %(default)s)')
+    parser.add_argument('-c', '--container-command', nargs=1, help='run, exec: command to run in container')
+    parser.add_argument('--with-deps', action='store_true', help='logs: also show the logs of the containers the containers depend on')
+    parser.add_argument('-D', '--with-dependents', action='store_true', help='stop: stop containers depending on the container first')
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS, help='number of parallel requests to the docker daemon')
+    parser.add_argument('-H', '--handover', action='store_true', help='restart: start the new instance before stopping the old one')
+    # the choices are dockerctl.container.PORT_CONFLICT_STOP_FIRST and PORT_CONFLICT_FAIL
+    parser.add_argument('--port-conflict', choices=['stop-first', 'fail'], default='stop-first',
+                        help='restart --handover: what to do with containers publishing host ports (default: %(default)s)')
+    parser.add_argument('--format', help='status: "table", "json" or a comma separated list of fields like "container,state,ip"')
+    parser.add_argument('-b', '--brief', action='store_true', help='status: one line per container from the container listing alone')
+    # the default is dockerctl.cleanup.DEFAULT_KEEP
+    parser.add_argument('--keep', type=int, default=1, help='gc: number of exited containers to keep per container (default: %(default)s)')
+    parser.add_argument('--gc-interval', type=int, metavar='SECONDS', help='serve: also remove exited containers every SECONDS')
+    parser.add_argument('-w', '--watch', action='store_true', help='status: keep showing the status and update it on changes')
+    parser.add_argument('-f', '--follow', action='store_true', help='logs: keep streaming new output')
+    parser.add_argument('--tail', type=int, help='logs: only show the last TAIL lines')
+    parser.add_argument('--since', type=parse_since, help='logs: only show output since a timestamp, a duration like 10m or a date')
+    parser.add_argument('--no-stream', action='store_true', help='stats: only take one sample instead of updating the table every second')
+    # the default is dockerctl.stats.DEFAULT_TEXTFILE_INTERVAL
+    parser.add_argument('--textfile', metavar='FILE', help='stats: also write the numbers to FILE in the Prometheus text format')
+    parser.add_argument('--textfile-interval', type=int, default=15, metavar='SECONDS', help='stats: write FILE every SECONDS (default: %(default)s)')
+    parser.add_argument('--profile', action='store_true', help='print where the time was spent when done')
+    parser.add_argument('--trace', metavar='FILE', help='write a JSON trace of where the time was spent to FILE')
+    parser.add_argument('--socket', default=server.SOCKET_PATH, help='unix socket of the dockerctl server (default: %(default)s)')
+    # the default is dockerctl.state.STATE_DIR
+    parser.add_argument('--state-dir', default='/run/dockerctl', help='directory to record the containers dockerctl started in (default: %(default)s)')
+    parser.add_argument('--no-server', action='store_true', help='never forward the command to a running dockerctl server')
+    parser.add_argument('command', nargs=1, help=cmd_help, choices=['start', 'stop', 'restart', 'apply', 'pull', 'gc', 'status', 'logs', 'stats', 'run', 'exec', 'shell', 'serve'])
+    parser.add_argument('containers', nargs='*', metavar='container', help='dockerctl container names or glob patterns')
+
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+
+    logging.basicConfig(format='[%(levelname)s] %(message)s')
+    logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
+
+    cmd = args.command[0]
+
+    profiling = args.profile or args.trace
+    if cmd in FORWARDED_COMMANDS and not (args.use_cmdline_client or args.use_socket_client or args.no_server or args.watch or profiling):
+        exit_code = server.forward(args.socket, argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    docker_client = create_client(args)
+
+    if profiling:
+        from dockerctl.profiling import profiler, InstrumentedClient
+        profiler.enabled = True
+        docker_client = InstrumentedClient(docker_client)
+
+    from dockerctl.state import StateStore
+    state = StateStore(args.state_dir)
+    if cmd == 'serve':
+        server.serve(args.socket, docker_client, build_parser, execute,
+                     gc_interval=args.gc_interval, gc_keep=args.keep, jobs=args.jobs, state=state)
+    else:
+        from dockerctl.snapshot import ContainerSnapshot
+        try:
+            exit_code = execute(args, docker_client, ContainerSnapshot(docker_client, state))
+        finally:
+            if args.profile:
+                sys.stderr.write(profiler.summary() + '\n')
+            if args.trace:
+                profiler.write_trace(args.trace)
+        sys.exit(exit_code)
+
+
+def create_client(args):
+    """ Create the docker client selected by `args`, importing only its backend """
+    if args.use_cmdline_client:
+        from dockerctl.docker_cmdline_client import DockerCmdlineClient
+        return DockerCmdlineClient()
+    if args.use_socket_client:
+        from dockerctl.docker_socket_client import DockerSocketClient
+        return DockerSocketClient(args.docker_socket, pool_size=args.jobs)
+
+    from dockerctl.docker_py_client import DockerPyClient
+    return DockerPyClient()
+
+
+def execute(args, docker_client, snapshot):
+    """ Execute the command given by the parsed `args` and return the exit code """
+    try:
+        return COMMANDS[args.command[0]](args, docker_client, snapshot) or 0
+    except ContainerException as e:
+        logger.error(e.message)
+        return 1
+    except subprocess.CalledProcessError as e:
+        logger.error('Subprocess %s failed with %d' % (e.cmd, e.returncode))
+        return 2
+
+
+def bulk_command(args, docker_client, snapshot):
+    from dockerctl.bulk import BulkOperation, select_names
+
+    cmd = args.command[0]
+    names = select_names(args.containers, all=args.all)
+    if not names:
+        raise ContainerException('No container given')
+    bulk = BulkOperation(docker_client, snapshot, jobs=args.jobs)
+    if cmd == 'start':
+        failures = bulk.start(names)
+    elif cmd == 'stop':
+        failures = bulk.stop(names, with_dependents=args.with_dependents)
+    else:
+        failures = bulk.restart(names, handover=args.handover, port_conflict=args.port_conflict)
+
+    return report_results(names, failures)
+
+
+def apply_command(args, docker_client, snapshot):
+    from dockerctl.bulk import BulkOperation, select_names
+
+    names = select_names(args.containers, all=args.all or not args.containers)
+    failures = BulkOperation(docker_client, snapshot, jobs=args.jobs).apply(names)
+    for name, ex in sorted(failures.iteritems()):
+        logger.error('%s: %s' % (name, ex))
+
+    return 1 if failures else 0
+
+
+def gc_command(args, docker_client, snapshot):
+    from dockerctl.cleanup import collect_garbage
+
+    removed = collect_garbage(docker_client, snapshot, keep=args.keep, jobs=args.jobs)
+    logger.info('Removed %d exited container(s)' % len(removed))
+
+
+def pull_command(args, docker_client, snapshot):
+    from dockerctl.bulk import BulkOperation, select_names
+
+    names = select_names(args.containers, all=args.all)
+    if not names:
+        raise ContainerException('No container given')
+    pulled = BulkOperation(docker_client, snapshot, jobs=args.jobs).pull(names)
+    logger.info('Pulled %d image(s)' % len(pulled))
+
+
+def run_command(args, docker_client, snapshot):
+    container = single_container(args, docker_client, snapshot)
+    container_cmd = args.container_command or '/bin/bash'
+    logger.info('Starting %s with command %s' % (container.config.name, container_cmd))
+    container.start(container_cmd, interactive=True)
+
+
+def exec_command(args, docker_client, snapshot):
+    import shlex
+
+    container = single_container(args, docker_client, snapshot)
+    if args.command[0] == 'shell':
+        command = SHELL_COMMAND
+    elif args.container_command:
+        command = shlex.split(args.container_command[0])
+    else:
+        raise ContainerException('No command given, use -c COMMAND')
+    # a tty is only allocated when dockerctl itself runs in a terminal, so
+    # that input and output can be piped
+    tty = sys.stdin.isatty() and sys.stdout.isatty()
+
+    return container.exec_command(command, tty=tty)
+
+
+def logs_command(args, docker_client, snapshot):
+    from dockerctl.bulk import select_names
+    from dockerctl.container import Container
+    from dockerctl.container_config import ContainerConfig
+
+    names = select_names(args.containers, all=args.all)
+    if not names:
+        raise ContainerException('No container given')
+    if args.with_deps:
+        from dockerctl.scheduler import DependencyGraph
+        names = sorted(DependencyGraph.for_names(names).configs)
+
+    try:
+        if len(names) == 1:
+            # a single stream is passed through as is, without timestamps
+            Container(ContainerConfig(names[0]), docker_client, snapshot).logs(
+                follow=args.follow, tail=args.tail, since=args.since)
+        else:
+            from dockerctl.logs import merged_logs
+
+            snapshot.prefetch()
+            containers = [Container(ContainerConfig(name), docker_client, snapshot) for name in names]
+            merged_logs(containers, follow=args.follow, tail=args.tail, since=args.since)
+    except KeyboardInterrupt:
+        pass
+
+
+def stats_command(args, docker_client, snapshot):
+    from dockerctl.bulk import select_names
+    from dockerctl.stats import StatsCollector, prometheus_text, show_stats, stats_lines, write_textfile
+
+    names = select_names(args.containers, all=args.all or not args.containers)
+    collector = StatsCollector(docker_client, snapshot, names)
+    if args.no_stream:
+        collector.sample(jobs=args.jobs)
+        totals = collector.totals()
+        if args.textfile:
+            write_textfile(args.textfile, prometheus_text(totals))
+        else:
+            print '\n'.join(stats_lines(totals))
+        return
+
+    try:
+        # as a service writing the text file, don't fill the log with tables
+        show_stats(collector, table=sys.stdout.isatty() or not args.textfile,
+                   textfile=args.textfile, textfile_interval=args.textfile_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def status_command(args, docker_client, snapshot):
+    from dockerctl.container import Container
+    from dockerctl.container_config import ContainerConfig
+
+    if args.watch:
+        from dockerctl.container_index import LiveContainerIndex
+        from dockerctl.watch import watch_status
+
+        index = LiveContainerIndex(docker_client)
+        containers = [Container(config, docker_client, index)
+                      for config in ContainerConfig.available()]
+        watch_status(containers, index)
+    elif args.format or args.brief:
+        from dockerctl.status import status_lines
+
+        snapshot.prefetch()
+        containers = [Container(config, docker_client, snapshot)
+                      for config in ContainerConfig.available()]
+        for line in status_lines(containers, args.format or 'table', brief=args.brief, jobs=args.jobs):
+            sys.stdout.write(line + '\n')
+            sys.stdout.flush()
+    else:
+        from dockerctl.status import status_reports
+
+        snapshot.prefetch()
+        containers = [Container(config, docker_client, snapshot)
+                      for config in ContainerConfig.available()]
+        for report in status_reports(containers, jobs=args.jobs):
+            print report
+
+
+def single_container(args, docker_client, snapshot):
+    """ Return the one container a command like `logs` or `run` works on """
+    from dockerctl.container import Container
+    from dockerctl.container_config import ContainerConfig
+
+    if not args.containers:
+        raise ContainerException('No container given')
+    if len(args.containers) > 1:
+        raise ContainerException('Command %s takes only one container' % args.command[0])
+
+    return Container(ContainerConfig(args.containers[0]), docker_client, snapshot)
+
+
+COMMANDS = {
+    'start':   bulk_command,
+    'stop':    bulk_command,
+    'restart': bulk_command,
+    'apply':   apply_command,
+    'pull':    pull_command,
+    'gc':      gc_command,
+    'run':     run_command,
+    'logs':    logs_command,
+    'stats':   stats_command,
+    'exec':    exec_command,
+    'shell':   exec_command,
+    'status':  status_command,
+}
+
+
+def report_results(names, failures):
+    """ Log the result for each container and return the exit code """
+    for name in names:
+        if name not in failures:
+            logger.info('%s: ok' % name)
+    for name, ex in sorted(failures.iteritems()):
+        logger.error('%s: %s' % (name, ex))
+
+    return 1 if failures else 0
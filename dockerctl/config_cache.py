@@ -0,0 +1,122 @@
+from dockerctl.profiling import span
+from dockerctl.utils import atomic_write
+import atexit
+import json
+import logging
+import os
+import os.path
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigCache(object):
+    """ Parsed config files, persisted in a single cache file
+
+    Entries are keyed on the config file's path and validated against its
+    mtime and size, so only files that changed since the cache was written
+    are parsed again. The cache file is read lazily on first access and
+    written once at exit if anything changed. It is JSON rather than a
+    pickle, so reading it can't run code.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(self, config_dir, cache_file):
+        self.config_dir = config_dir
+        self.cache_file = cache_file
+        self._entries = None
+        self._dirty = False
+
+    def names(self):
+        return sorted(fn[:-5] for fn in os.listdir(self.config_dir) if fn.endswith('.conf'))
+
+    def get(self, name):
+        path = os.path.join(self.config_dir, '%s.conf' % name)
+        st = os.stat(path)
+        entries = self._get_entries()
+        entry = entries.get(path)
+        if entry is not None and entry[0] == st.st_mtime and entry[1] == st.st_size:
+            return entry[2]
+
+        logger.debug('Parsing config file %s' % path)
+        with span('config.yaml_load', config=name), open(path) as fd:
+            data = load_yaml(fd)
+        entries[path] = (st.st_mtime, st.st_size, data)
+        self._mark_dirty()
+
+        return data
+
+    def save(self):
+        if not self._dirty:
+            return
+        entries = dict((path, entry) for path, entry in self._entries.iteritems()
+                       if os.path.exists(path) and _survives_json(entry[2]))
+        try:
+            atomic_write(self.cache_file, json.dumps({'version': self.FORMAT_VERSION, 'entries': entries}))
+            self._dirty = False
+        except (IOError, OSError) as ex:
+            logger.debug('Could not write config cache %s: %s' % (self.cache_file, ex))
+
+    def _get_entries(self):
+        if self._entries is None:
+            with span('config.cache_load'):
+                self._entries = self._load()
+        return self._entries
+
+    def _load(self):
+        try:
+            with open(self.cache_file) as fd:
+                cache = _from_json(json.load(fd))
+            if cache['version'] == self.FORMAT_VERSION:
+                return dict((path, tuple(entry)) for path, entry in cache['entries'].iteritems())
+        except Exception as ex:
+            logger.debug('Could not read config cache %s: %s' % (self.cache_file, ex))
+
+        return {}
+
+    def _mark_dirty(self):
+        if not self._dirty:
+            self._dirty = True
+            atexit.register(self.save)
+
+
+def _survives_json(data):
+    """ Return whether `data` is the same after a round trip through JSON
+
+    Configs that aren't, e.g. with numbers as keys, are not cached and
+    simply parsed again every time.
+    """
+    try:
+        return _from_json(json.loads(json.dumps(data))) == data
+    except (TypeError, ValueError):
+        return False
+
+
+def _from_json(data):
+    """ Turn the unicode strings json returns into the byte strings yaml
+    returns for ASCII text """
+    if isinstance(data, dict):
+        return dict((_from_json(key), _from_json(value)) for key, value in data.iteritems())
+    if isinstance(data, list):
+        return [_from_json(value) for value in data]
+    if isinstance(data, unicode):
+        try:
+            return data.encode('ascii')
+        except UnicodeEncodeError:
+            return data
+    return data
+
+
+def load_yaml(stream):
+    """ Parse YAML from `stream`
+
+    yaml is only imported here, so invocations that are served entirely
+    from the cache don't pay for importing it.
+    """
+    import yaml
+    try:
+        from yaml import CLoader as YamlLoader
+    except ImportError:
+        from yaml import Loader as YamlLoader
+
+    return yaml.load(stream, Loader=YamlLoader)
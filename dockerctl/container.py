@@ -1,42 +1,76 @@
 from dockerctl.container_config import ContainerConfig
-from dockerctl.docker_py_client import DockerPyClient
 from dockerctl.exceptions import ContainerException, ClientException
 from dockerctl.name_generator import generate_name
+from dockerctl.profiling import span
+from dockerctl.pull import PullPlanner
+from dockerctl.readiness import wait_until_ready
+from dockerctl.scheduler import DependencyGraph
+from dockerctl.snapshot import ContainerSnapshot, NAME_PATTERN, CONFIG_LABEL, CONFIG_HASH_LABEL, VERSION_LABEL, labels
+from dockerctl.status import format_ports, format_volumes
 from dockerctl.utils import pretty_date, parse_datetime
 import logging
-import re
+import sys
+import time
+try:
+    from dockerctl.version import version
+except ImportError:
+    version = 'DEV'
 
 logger = logging.getLogger(__name__)
 
+PORT_CONFLICT_STOP_FIRST = 'stop-first'
+PORT_CONFLICT_FAIL = 'fail'
+
 
 class Container(object):
     """ A `Container` represents a potential or running docker container """
 
-    def __init__(self, config, docker_client):
+    def __init__(self, config, docker_client, snapshot=None, puller=None):
         self.config = config
         self.client = docker_client
+        self.snapshot = snapshot or ContainerSnapshot(docker_client)
+        self.puller = puller or PullPlanner(docker_client)
 
-    def start(self, cmd=None, interactive=False):
+    def start(self, cmd=None, interactive=False, with_depends=True):
+        graph = self._dependency_graph() if with_depends else None
         if self.is_running():
             container_id = self.get_runtime_id()
             raise ContainerException('Cannot start container %s because it is already running with id %s' %
                             (self.config.name, container_id))
 
-        self.remove_exited_containers()
-        if self.config.get('autopull', False):
-            self.pull()
-        self.start_depends()
+        self.prepare()
+        if with_depends:
+            with span('container.start_depends', config=self.config.name):
+                self.start_depends(graph)
 
-        container_id = self.start_without_depends(cmd, interactive=interactive)
+        with span('container.run', config=self.config.name):
+            container_id = self.start_without_depends(cmd, interactive=interactive)
 
         return container_id
 
-    def start_depends(self):
-        for container_name in self.config.get('depends_on', []):
-            config = ContainerConfig(container_name)
-            container = Container(config, self.client)
-            if not container.is_running():
-                container.start()
+    def prepare(self):
+        if self.config.get('autopull', False):
+            with span('container.pull', config=self.config.name):
+                self.pull()
+
+    def start_depends(self, graph=None):
+        graph = graph or self._dependency_graph()
+
+        def start_dependency(name):
+            Container(graph.configs[name], self.client, self.snapshot, self.puller).ensure_started()
+
+        graph.run(start_dependency, graph.dependencies(self.config.name))
+
+    def ensure_started(self):
+        """ Start the container unless it is running, without its dependencies,
+        and wait until it is ready """
+        if self.is_running():
+            container_id = self.get_runtime_id()
+        else:
+            self.prepare()
+            with span('container.run', config=self.config.name):
+                container_id = self.start_without_depends()
+        self.wait_until_ready(container_id)
 
     def start_without_depends(self, cmd=None, interactive=False):
         image = self.config['image']
@@ -62,6 +96,12 @@ class Container(object):
             if path_name:
                 links[path_name] = alias
 
+        config_hash = self.config.config_hash()
+        container_labels = {
+            CONFIG_LABEL: self.config.name,
+            CONFIG_HASH_LABEL: config_hash,
+            VERSION_LABEL: version,
+        }
         container_id = self.client.run(
             image,
             detach=not interactive,
@@ -71,62 +111,143 @@ class Container(object):
             name=name,
             binds=volumes,
             port_bindings=port_bindings,
-            links=links)
+            links=links,
+            labels=container_labels)
+        if interactive:
+            # an interactive container has exited by now
+            self.snapshot.invalidate(self.config.name)
+        else:
+            self.snapshot.started(self.config.name, {
+                'Command': command if isinstance(command, basestring) else ' '.join(command or []),
+                'Created': int(time.time()),
+                'Id':      container_id,
+                'Image':   image,
+                'Labels':  container_labels,
+                'Names':   ['/%s' % name],
+                'Status':  'RUNNING',
+            })
+            self.snapshot.record(self.config.name, container_id, name, config_hash)
 
         logger.info('Started container %s with id %s' % (name, container_id))
 
         return container_id
 
-    def remove_exited_containers(self):
-        containers = self.get_containers_by_image_name(self.config.name, only_running=False)
-        exited_containers = filter(
-            lambda c: c['Status'] == 'EXITED',
-            containers
-        )
-        for container in exited_containers:
-            logger.info('Removing exited %s container %s' % (self.config.name, container['Id']))
-            try:
-                self.client.remove_container(container['Id'])
-            except ClientException as ex:
-                logger.warn('Could not remove container %s: %s' % (container['Id'], ex))
-
-    def stop(self):
+    def wait_until_ready(self, container_id):
+        with span('container.wait_until_ready', config=self.config.name):
+            wait_until_ready(self.client, self.config, container_id)
+
+    def stop(self, with_dependents=False):
         if not self.is_running():
             raise ContainerException('Cannot stop container %s because it is not running' % self.config.name)
 
+        if with_dependents:
+            self.stop_dependents()
         container_id = self.get_runtime_id()
         self.client.stop(container_id)
+        self.snapshot.invalidate(self.config.name)
+        self.snapshot.forget(self.config.name, container_id)
+
+    def handover(self, port_conflict=PORT_CONFLICT_STOP_FIRST):
+        """ Restart the container by starting a new instance first and stopping
+        the old one only after the new one is ready
+
+        Two instances can't publish the same host ports. For configs with
+        `ports`, `port_conflict` decides whether to fall back to stopping the
+        old instance first ('stop-first') or to fail ('fail').
+        """
+        graph = self._dependency_graph()
+        old_container = self.get_running_container_by_image_name(self.config.name)
+        if old_container is None:
+            raise ContainerException('Cannot restart container %s because it is not running' % self.config.name)
+
+        if self.config.get('ports'):
+            if port_conflict == PORT_CONFLICT_FAIL:
+                raise ContainerException('Cannot hand over container %s because it publishes host ports' % self.config.name)
+            logger.info('Container %s publishes host ports, stopping the old instance first' % self.config.name)
+            self.stop()
+            return self.start()
+
+        self.prepare()
+        self.start_depends(graph)
+        container_id = self.start_without_depends()
+        try:
+            self.wait_until_ready(container_id)
+            if not self.client.inspect_container(container_id)['State']['Running']:
+                raise ContainerException('New instance %s of container %s exited' % (container_id, self.config.name))
+        except Exception:
+            logger.warn('Removing failed new instance %s of container %s' % (container_id, self.config.name))
+            self._stop_and_remove(container_id)
+            raise
+
+        logger.info('Handing over container %s from %s to %s' % (self.config.name, old_container['Id'], container_id))
+        self._stop_and_remove(old_container['Id'])
+
+        return container_id
+
+    def _stop_and_remove(self, container_id):
+        try:
+            self.client.stop(container_id)
+            self.client.remove_container(container_id)
+        except ClientException as ex:
+            logger.warn('Could not remove container %s: %s' % (container_id, ex))
+        self.snapshot.invalidate(self.config.name)
+        self.snapshot.forget(self.config.name, container_id)
+
+    def _dependency_graph(self):
+        """ Build the graph of this container and its dependencies, whose
+        containers are then looked up in one listing """
+        graph = DependencyGraph.for_names([self.config.name])
+        if len(graph.configs) > 1:
+            self.snapshot.prefetch_for(graph.configs)
+        return graph
+
+    def stop_dependents(self):
+        graph = DependencyGraph(ContainerConfig.available())
+        self.snapshot.prefetch()
+
+        def stop_dependent(name):
+            container = Container(graph.configs[name], self.client, self.snapshot, self.puller)
+            if container.is_running():
+                logger.info('Stopping dependent container %s' % name)
+                container.stop()
+
+        graph.run(stop_dependent, graph.dependents(self.config.name), reverse=True)
 
     def pull(self):
-        image = self.config['image']
-        self.client.pull(image)
+        self.puller.pull([(self.config['image'], self.config.get('pull_ttl', 0))])
 
-    def logs(self):
+    def logs(self, follow=False, tail=None, since=None, out=None):
+        out = out or sys.stdout
         container_id = self.get_runtime_id()
-        print self.client.logs(container_id)
+        if container_id is None:
+            raise ContainerException('Cannot show logs of container %s because it is not running' % self.config.name)
+
+        for chunk in self.client.logs(container_id, follow=follow, tail=tail, since=since):
+            out.write(chunk)
+            out.flush()
+
+    def exec_command(self, command, tty=False, stdin=True):
+        """ Run `command`, a list, in the running instance of the container,
+        connected to the terminal, and return its exit code """
+        container_id = self.get_runtime_id()
+        if container_id is None:
+            raise ContainerException('Cannot execute a command in container %s because it is not running' % self.config.name)
+
+        return self.client.exec_attach(container_id, command, tty=tty, stdin=stdin)
 
     def status(self):
-        if not self.is_running():
-            print('Container %s is not running\n' % self.config.name)
+        print self.format_status(self.inspect())
+
+    def inspect(self):
+        container_id = self.get_runtime_id()
+
+        return self.client.inspect_container(container_id) if container_id else None
+
+    def format_status(self, data):
+        if data is None:
+            return 'Container %s is not running\n' % self.config.name
         else:
-            container_id = self.get_runtime_id()
-            data = self.client.inspect_container(container_id)
-            pretty_volumes = []
-            pretty_ports = []
-
-            if data['Volumes']:
-                pretty_volumes = [
-                    '%s -> %s %s' % (host_dir, container_dir, '' if data['VolumesRW'][host_dir] else '[read-only]')
-                    for host_dir, container_dir in data['Volumes'].iteritems()
-                ]
-            if data['NetworkSettings'] and data['NetworkSettings']['Ports']:
-                pretty_ports = [
-                    '%s:%s -> %s' % (port['HostIp'] if port['HostIp'] else '*', port['HostPort'], container_port)
-                    for container_port, ports in data['NetworkSettings']['Ports'].iteritems()
-                    for port in (ports if ports else [])
-                ]
-
-            print '''\
+            return '''\
 Container:  %(container_name)s
 Id:         %(id)s
 Name:       %(name)s
@@ -138,15 +259,15 @@ Ports:      %(ports)s
 Volumes:    %(volumes)s
             ''' % {
                 'container_name': self.config.name,
-                'id': container_id,
+                'id': data['Id'],
                 'name': data['Name'][1:],
                 'image': data['Image'],
                 'command': '%s %s' % (data['Path'], ' '.join(data['Args'])),
                 'created': pretty_date(parse_datetime(data['Created'])),
                 'started': pretty_date(parse_datetime(data['State']['StartedAt'])),
                 'ip_address': data['NetworkSettings']['IPAddress'],
-                'ports': '\n            '.join(pretty_ports),
-                'volumes': '\n            '.join(pretty_volumes),
+                'ports': '\n            '.join(format_ports(data)),
+                'volumes': '\n            '.join(format_volumes(data)),
             }
 
     def get_runtime_id(self):
@@ -165,14 +286,17 @@ Volumes:    %(volumes)s
         return containers_and_names[0] if len(containers_and_names) == 1 else None
 
     def get_containers_by_image_name(self, image_name, only_running=True):
-        containers = self.client.containers(all=not only_running)
-        return [container
-                for container in containers
-                if self.matching_name(container, image_name)]
+        return self.snapshot.containers(image_name, only_running=only_running)
 
     def matching_name(self, container, image_name):
+        if labels(container).get(CONFIG_LABEL) == image_name:
+            # the container's own name, not one of the names it has as a link
+            for name in container['Names']:
+                if '/' not in name[1:]:
+                    return name
+
         for name in container['Names']:
-            mo = re.match(r'^/?(.*)-[a-zA-Z0-9_]+$', name)
+            mo = NAME_PATTERN.match(name)
             if mo and mo.group(1) == image_name:
                 return name
 
@@ -1,11 +1,18 @@
-import os
-import os.path
-import yaml
+from dockerctl.config_cache import ConfigCache
+import hashlib
+import json
 
 
 class ContainerConfig(dict):
 
     DOCKER_CONTAINER_DIR = '/etc/dockerctl'
+    CACHE_FILE = '/var/cache/dockerctl/configs.cache'
+
+    # the settings that make up a container; changing others, like `ready`
+    # or `autopull`, doesn't require a new container
+    HASHED_KEYS = ('image', 'command', 'args', 'environment', 'volumes', 'ports', 'links', 'depends_on')
+
+    _cache = None
 
     def __init__(self, name):
         self.name = name
@@ -13,13 +20,18 @@ class ContainerConfig(dict):
 
     @classmethod
     def available(cls):
-        conf_files = filter(lambda fn: fn.endswith('.conf'), os.listdir(cls.DOCKER_CONTAINER_DIR))
-        configs = map(lambda fn: ContainerConfig(fn[:-5]), conf_files)
+        return [ContainerConfig(name) for name in cls.cache().names()]
 
-        return configs
+    @classmethod
+    def cache(cls):
+        if cls._cache is None or cls._cache.config_dir != cls.DOCKER_CONTAINER_DIR:
+            cls._cache = ConfigCache(cls.DOCKER_CONTAINER_DIR, cls.CACHE_FILE)
+        return cls._cache
 
     def read_config(self):
-        config_filename = '%s/%s.conf' % (self.DOCKER_CONTAINER_DIR, self.name)
-        with open(config_filename) as fd:
-            self.update(yaml.load(fd))
+        self.update(self.cache().get(self.name))
 
+    def config_hash(self):
+        """ Return a hash of the settings that make up the container """
+        settings = dict((key, self[key]) for key in self.HASHED_KEYS if self.get(key))
+        return hashlib.sha1(json.dumps(settings, sort_keys=True)).hexdigest()
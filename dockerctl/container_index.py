@@ -0,0 +1,88 @@
+from dockerctl.snapshot import ContainerSnapshot, config_names
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LiveContainerIndex(ContainerSnapshot):
+    """ A container snapshot that is kept current by the docker events stream
+
+    The index is seeded from one listing of all containers. After that, a
+    background thread consumes the events stream and only re-lists the
+    single container an event is about. Subscribers are called with the
+    set of config names whose containers changed.
+    """
+
+    RECONNECT_DELAY = 1
+
+    def __init__(self, docker_client, state=None):
+        ContainerSnapshot.__init__(self, docker_client, state)
+        self._subscribers = []
+        self._thread = None
+
+    def start(self):
+        """ Seed the index and start following the events stream """
+        if self._thread is None:
+            since = int(time.time())
+            self.invalidate()
+            self.prefetch()
+            self._thread = threading.Thread(target=self._follow_events, args=(since,), name='container-events')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def containers(self, config_name, only_running=True):
+        self.prefetch()
+        return ContainerSnapshot.containers(self, config_name, only_running=only_running)
+
+    def _follow_events(self, since):
+        while True:
+            try:
+                for event in self.client.events(since=since):
+                    logger.debug('Container %s: %s' % (event['Id'], event['Action']))
+                    self._update(event['Id'])
+            except Exception as ex:
+                logger.warn('Lost docker events stream: %s' % ex)
+            time.sleep(self.RECONNECT_DELAY)
+
+            since = int(time.time())
+            self.invalidate()
+            self.prefetch()
+            self._notify(self._get_config_names())
+
+    def _update(self, container_id):
+        containers = self.client.containers(all=True, filters={'id': container_id})
+
+        with self._lock:
+            if self._index is None:
+                return
+            changed = set()
+            for config_name, config_containers in self._index.items():
+                remaining = [c for c in config_containers if c['Id'] != container_id]
+                if len(remaining) != len(config_containers):
+                    self._index[config_name] = remaining
+                    changed.add(config_name)
+            for container in containers:
+                for config_name in set(config_names(container)):
+                    self._index[config_name] = self._index.get(config_name, []) + [container]
+                    changed.add(config_name)
+            # the index is current again for the changed configs
+            for config_name in changed:
+                self._stale.discard(config_name)
+                self._by_name.pop((config_name, True), None)
+                self._by_name.pop((config_name, False), None)
+
+        if changed:
+            self._notify(changed)
+
+    def _get_config_names(self):
+        with self._lock:
+            return set(self._index or [])
+
+    def _notify(self, config_names):
+        for callback in self._subscribers:
+            callback(config_names)
@@ -1,7 +1,9 @@
 from dockerctl.exceptions import ClientException
+from dockerctl.profiling import span
+from dockerctl.utils import repo_digest, parse_created_at, parse_size
 import json
 import logging
-import re
+import os
 import subprocess
 
 
@@ -10,14 +12,16 @@ logger = logging.getLogger(__name__)
 class DockerCmdlineClient:
 
     DOCKER = 'docker'
+    CHUNK_SIZE = 64 * 1024
 
     def __init__(self):
         pass
 
     def _run_cmd(self, cmd):
         logger.debug('Running %s' % (' '.join(arg.replace('\\', '\\\\').replace(' ', '\\ ') for arg in cmd)))
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        (output, _) = process.communicate()
+        with span('subprocess.%s' % cmd[1]):
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            (output, _) = process.communicate()
         if process.returncode != 0:
             logger.warn('Command failed (%d): %s' % (process.returncode, output))
             raise ClientException('Command failed (%d): %s' % (process.returncode, output))
@@ -25,32 +29,79 @@ class DockerCmdlineClient:
             logger.debug('Return code %d' % process.returncode)
         return output
 
-    def containers(self, all=False):
-        cmd = [self.DOCKER, 'ps', '--no-trunc=true']
+    def _stream_cmd(self, cmd):
+        """ Run `cmd` and yield its output in chunks as soon as they arrive """
+        logger.debug('Streaming %s' % (' '.join(arg.replace('\\', '\\\\').replace(' ', '\\ ') for arg in cmd)))
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        last_chunk = ''
+        try:
+            while True:
+                chunk = os.read(process.stdout.fileno(), self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                last_chunk = chunk
+                yield chunk
+            process.wait()
+        finally:
+            if process.poll() is None:
+                process.terminate()
+                process.wait()
+            process.stdout.close()
+        if process.returncode != 0:
+            logger.warn('Command failed (%d): %s' % (process.returncode, last_chunk))
+            raise ClientException('Command failed (%d): %s' % (process.returncode, last_chunk))
+
+    def _stream_lines(self, cmd):
+        """ Run `cmd` and yield its output line by line as soon as lines are complete """
+        buf = ''
+        for chunk in self._stream_cmd(cmd):
+            lines = (buf + chunk).split('\n')
+            buf = lines.pop()
+            for line in lines:
+                yield line
+        if buf:
+            yield buf
+
+    def containers(self, all=False, filters=None):
+        cmd = [self.DOCKER, 'ps', '--no-trunc=true', '--format={{json .}}']
         if all:
             cmd.append('-a')
+        cmd.extend(self._filter_args(filters))
         output = self._run_cmd(cmd)
-        lines = self._parse_containers_output(output)
         return [
             {
-                'Command': line[2],
-                'Id':      line[0],
-                'Image':   line[1],
-                'Names':   line[-1].split(','),
-                'Status':  'EXITED' if line[4].startswith('Exited') else 'RUNNING'
+                'Command': row['Command'].strip('"'),
+                'Id':      row['ID'],
+                'Image':   row['Image'],
+                'Names':   ['/%s' % name for name in row['Names'].split(',')],
+                'Labels':  self._parse_labels(row.get('Labels', '')),
+                'Created': parse_created_at(row['CreatedAt']),
+                'Status':  'EXITED' if row['Status'].startswith('Exited') else 'RUNNING'
             }
-            for line in lines
+            for row in self._parse_json_lines(output)
         ]
 
-    def _parse_containers_output(self, output):
+    def _filter_args(self, filters):
+        args = []
+        for key, values in sorted((filters or {}).iteritems()):
+            for value in (values if isinstance(values, list) else [values]):
+                args.append('--filter=%s=%s' % (key, value))
+        return args
+
+    def _parse_labels(self, labels):
+        """ Parse the labels `docker ps` formats as 'key=value,key=value' """
+        return dict(label.split('=', 1) for label in labels.split(',') if '=' in label)
+
+    def _parse_json_lines(self, output):
         return [
-            re.sub(r'\s{3,}', '   ', line).strip().split('   ')
-            for line in output.splitlines()[1:]
+            json.loads(line)
+            for line in output.splitlines()
+            if line.startswith('{')
         ]
 
     def run(self, image, detach=False, tty=False,
             command=None, environment=None, name=None,
-            binds=None, port_bindings=None, links=None):
+            binds=None, port_bindings=None, links=None, labels=None):
         cmd = [self.DOCKER, 'run']
 
         if detach: cmd.append('-d')
@@ -76,10 +127,12 @@ class DockerCmdlineClient:
                 'name': key,
                 'alias': value
             })
+        for key, value in sorted((labels or {}).iteritems()):
+            cmd.append('--label=%s=%s' % (key, value))
         cmd.append(image)
         if command: cmd.extend(command.split())
 
-        container_id = self._run_cmd(cmd)
+        container_id = self._run_cmd(cmd).strip()
         return container_id
 
     def stop(self, container_id):
@@ -88,8 +141,93 @@ class DockerCmdlineClient:
     def pull(self, image):
         self._run_cmd([self.DOCKER, 'pull', image])
 
-    def logs(self, container_id):
-        return self._run_cmd([self.DOCKER, 'logs', container_id])
+    def image_digest(self, image):
+        """ Return the registry digest of the local image, or None if unknown """
+        try:
+            output = self._run_cmd([self.DOCKER, 'image', 'inspect', '--format={{json .RepoDigests}}', image])
+        except ClientException:
+            return None
+
+        return repo_digest(image, json.loads(output))
+
+    def registry_digest(self, image):
+        """ The docker command has no stable way to get a registry digest
+        without pulling, so the pull itself has to check for updates """
+        return None
+
+    def logs(self, container_id, follow=False, tail=None, since=None, timestamps=False):
+        cmd = [self.DOCKER, 'logs']
+        if follow:            cmd.append('--follow')
+        if timestamps:        cmd.append('--timestamps')
+        if tail is not None:  cmd.append('--tail=%s' % tail)
+        if since is not None: cmd.append('--since=%s' % since)
+        cmd.append(container_id)
+
+        return self._stream_cmd(cmd)
+
+    def stats(self, container_id, stream=True):
+        """ Yield samples of the resource usage of the running container,
+        one per second while `stream` is true """
+        cmd = [self.DOCKER, 'stats', '--format={{json .}}']
+        if not stream:
+            cmd.append('--no-stream')
+        cmd.append(container_id)
+
+        for line in self._stream_lines(cmd):
+            # while streaming, docker clears the screen before each sample
+            if '{' in line:
+                yield self._parse_stats(json.loads(line[line.index('{'):]))
+
+    def _parse_stats(self, row):
+        """ Parse the sizes `docker stats` formats as 'used / limit' or 'in / out' """
+        memory_usage, memory_limit = row['MemUsage'].split(' / ')
+        network_rx, network_tx = row['NetIO'].split(' / ')
+        block_read, block_write = row['BlockIO'].split(' / ')
+        return {
+            'CPUPercent':  float(row['CPUPerc'].rstrip('%') or 0),
+            'MemoryUsage': parse_size(memory_usage),
+            'MemoryLimit': parse_size(memory_limit),
+            'NetworkRx':   parse_size(network_rx),
+            'NetworkTx':   parse_size(network_tx),
+            'BlockRead':   parse_size(block_read),
+            'BlockWrite':  parse_size(block_write),
+        }
+
+    def events(self, since=None):
+        """ Yield container events as dicts with the keys 'Id' and 'Action' """
+        cmd = [self.DOCKER, 'events', '--format={{json .}}', '--filter=type=container']
+        if since is not None:
+            cmd.append('--since=%s' % since)
+
+        for line in self._stream_lines(cmd):
+            if not line.startswith('{'):
+                continue
+            event = json.loads(line)
+            if 'id' in event:
+                yield {
+                    'Id':     event['id'],
+                    'Action': event.get('Action') or event['status'],
+                }
+
+    def execute(self, container_id, command):
+        """ Run `command` in the running container and return its exit code and output """
+        cmd = [self.DOCKER, 'exec', container_id] + command.split()
+        logger.debug('Running %s' % ' '.join(cmd))
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        (output, _) = process.communicate()
+        return process.returncode, output
+
+    def exec_attach(self, container_id, command, tty=False, stdin=True):
+        """ Run `command`, a list, in the running container, connected to
+        the terminal, and return its exit code """
+        cmd = [self.DOCKER, 'exec']
+        if stdin: cmd.append('--interactive')
+        if tty:   cmd.append('--tty')
+        cmd.append(container_id)
+        cmd.extend(command)
+        logger.debug('Running %s' % ' '.join(cmd))
+
+        return subprocess.call(cmd)
 
     def inspect_container(self, container_id):
         output = self._run_cmd([self.DOCKER, 'inspect', container_id])
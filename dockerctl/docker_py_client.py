@@ -1,5 +1,6 @@
 from dockerctl.exceptions import ClientException
-from dockerctl.utils import split_image_and_tag
+from dockerctl.terminal import attach
+from dockerctl.utils import split_image_and_tag, repo_digest, stats_sample
 import docker
 import json
 import logging
@@ -11,8 +12,8 @@ class DockerPyClient:
     def __init__(self):
         self._client = docker.Client()
 
-    def containers(self, all=False):
-        containers = self._client.containers(all=all)
+    def containers(self, all=False, filters=None):
+        containers = self._client.containers(all=all, filters=filters)
 
         return [
             {
@@ -20,6 +21,8 @@ class DockerPyClient:
                 'Id':      container['Id'],
                 'Image':   container['Image'],
                 'Names':   container['Names'],
+                'Labels':  container.get('Labels') or {},
+                'Created': container['Created'],
                 'Status':  'EXITED' if container['Status'].startswith('Exited') else 'RUNNING',
             }
             for container in containers
@@ -27,7 +30,7 @@ class DockerPyClient:
 
     def run(self, image, detach=False, tty=False,
             command=None, environment=None, name=None,
-            binds=None, port_bindings=None, links=None):
+            binds=None, port_bindings=None, links=None, labels=None):
         container = self._client.create_container(
             image,
             detach=detach,
@@ -36,7 +39,8 @@ class DockerPyClient:
             command=command,
             volumes=[bind['bind'] for bind in binds.values()],
             environment=environment,
-            name=name)
+            name=name,
+            labels=labels)
 
         self._client.start(
             container,
@@ -55,13 +59,83 @@ class DockerPyClient:
             json_msg = json.loads(msg)
             progress = '%s ' % json_msg['progress'] if json_msg.has_key('progress') else ''
             status = json_msg.get('status', '')
-            logger.info('%s%s' % (progress, status))
+            logger.info('%s:%s: %s%s' % (image, tag, progress, status))
 
-    def logs(self, container_id):
-        return self._client.logs(container_id)
+    def image_digest(self, image):
+        """ Return the registry digest of the local image, or None if unknown """
+        try:
+            data = self._client.inspect_image(image)
+        except docker.errors.APIError:
+            return None
+
+        return repo_digest(image, data.get('RepoDigests'))
+
+    def registry_digest(self, image):
+        """ Return the digest of the image in its registry, or None if unknown """
+        # docker-py has no method for the distribution endpoint, so this uses
+        # the private helpers its own methods are built on, as they are in
+        # docker-py 1.10. Should they change, the digest is unknown and the
+        # image is simply pulled.
+        try:
+            response = self._client._get(self._client._url('/distribution/{0}/json', image))
+            return self._client._result(response, True)['Descriptor']['digest']
+        except (docker.errors.APIError, KeyError) as ex:
+            logger.debug('Could not get registry digest of %s: %s' % (image, ex))
+            return None
+        except (AttributeError, TypeError) as ex:
+            logger.debug('This version of docker-py cannot get registry digests: %s' % ex)
+            return None
+
+    def logs(self, container_id, follow=False, tail=None, since=None, timestamps=False):
+        return self._client.logs(
+            container_id,
+            stream=True,
+            timestamps=timestamps,
+            follow=follow,
+            tail='all' if tail is None else tail,
+            since=since)
+
+    def stats(self, container_id, stream=True):
+        """ Yield samples of the resource usage of the running container,
+        one per second while `stream` is true """
+        if not stream:
+            yield stats_sample(self._client.stats(container_id, stream=False))
+            return
+        for stats in self._client.stats(container_id, decode=True):
+            yield stats_sample(stats)
+
+    def events(self, since=None):
+        """ Yield container events as dicts with the keys 'Id' and 'Action' """
+        for event in self._client.events(since=since, filters={'type': 'container'}, decode=True):
+            if event.get('Type', 'container') == 'container' and 'id' in event:
+                yield {
+                    'Id':     event['id'],
+                    'Action': event.get('Action') or event['status'],
+                }
+
+    def execute(self, container_id, command):
+        """ Run `command` in the running container and return its exit code and output """
+        exec_id = self._client.exec_create(container_id, command)
+        output = self._client.exec_start(exec_id)
+        return self._client.exec_inspect(exec_id)['ExitCode'], output
+
+    def exec_attach(self, container_id, command, tty=False, stdin=True):
+        """ Run `command`, a list, in the running container, connected to
+        the terminal, and return its exit code """
+        exec_id = self._client.exec_create(container_id, command, stdin=stdin, tty=tty)
+        sock = self._client.exec_start(exec_id, tty=tty, socket=True)
+        try:
+            attach(sock, tty=tty, stdin=stdin)
+        finally:
+            sock.close()
+
+        return self._client.exec_inspect(exec_id)['ExitCode']
 
     def inspect_container(self, container_id):
-        return self._client.inspect_container(container_id)
+        try:
+            return self._client.inspect_container(container_id)
+        except docker.errors.APIError as ex:
+            raise ClientException('API error while inspecting container %s' % container_id, ex)
 
     def remove_container(self, container_id):
         try:
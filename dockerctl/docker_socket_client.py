@@ -0,0 +1,363 @@
+from dockerctl.exceptions import ClientException
+from dockerctl.terminal import attach, split_frames
+from dockerctl.utils import split_image_and_tag, repo_digest, stats_sample, DEFAULT_JOBS
+import httplib
+import json
+import logging
+import socket
+import threading
+import urllib
+
+logger = logging.getLogger(__name__)
+
+DOCKER_SOCKET = '/var/run/docker.sock'
+API_VERSION = '1.24'
+
+
+class UnixHTTPConnection(httplib.HTTPConnection):
+    """ HTTP/1.1 connection to a server listening on a unix socket """
+
+    def __init__(self, socket_path, timeout=None):
+        httplib.HTTPConnection.__init__(self, 'localhost')
+        self.socket_path = socket_path
+        self.socket_timeout = timeout
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.socket_timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class ConnectionPool(object):
+    """ Keeps up to `size` idle keep-alive connections for reuse
+
+    Any number of connections may be in use at once; connections beyond
+    `size` are closed when they are given back.
+    """
+
+    def __init__(self, socket_path, size=DEFAULT_JOBS, timeout=None):
+        self.socket_path = socket_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        """ Return an idle connection and whether it was reused """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return UnixHTTPConnection(self.socket_path, self.timeout), False
+
+    def put(self, conn):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class DockerSocketClient:
+    """ Talks HTTP/1.1 to the Docker Engine API on its unix socket
+
+    Neither docker-py nor the docker command are needed. Requests reuse
+    pooled keep-alive connections and the client is thread-safe, so the
+    bulk operations can run many requests concurrently without forking a
+    process or opening a connection for each.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, socket_path=DOCKER_SOCKET, pool_size=DEFAULT_JOBS, version=API_VERSION):
+        self.base_path = '/v%s' % version
+        self.pool = ConnectionPool(socket_path, size=pool_size)
+
+    def _url(self, path, *args):
+        return self.base_path + path.format(*[urllib.quote(arg, safe='/:') for arg in args])
+
+    def _request(self, method, url, params=None, body=None, headers=None, buffering=True):
+        """ Send a request and return the response and its connection
+
+        A pooled connection may have been closed by the daemon in the
+        meantime, so a request failing on a reused connection is retried
+        once on a new one.
+        """
+        if params:
+            url = '%s?%s' % (url, urllib.urlencode(params))
+        headers = dict(headers or {})
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+
+        while True:
+            conn, reused = self.pool.get()
+            try:
+                conn.request(method, url, body, headers)
+                response = conn.getresponse(buffering=buffering)
+                break
+            except (socket.error, httplib.HTTPException) as ex:
+                conn.close()
+                if not reused:
+                    raise ClientException('Request %s %s failed' % (method, url), ex)
+
+        if response.status >= 400:
+            message = response.read()
+            self._release(conn, response)
+            try:
+                message = json.loads(message)['message']
+            except (ValueError, KeyError, TypeError):
+                pass
+            raise ClientException('API error %d on %s %s:' % (response.status, method, url), message.strip())
+
+        return response, conn
+
+    def _release(self, conn, response):
+        if response.will_close:
+            conn.close()
+        else:
+            self.pool.put(conn)
+
+    def _call(self, method, url, params=None, body=None):
+        """ Send a request and return the decoded JSON response, if any """
+        response, conn = self._request(method, url, params, body)
+        data = response.read()
+        self._release(conn, response)
+        if data and response.getheader('Content-Type', '').startswith('application/json'):
+            return json.loads(data)
+        return data
+
+    def _stream(self, method, url, params=None, body=None):
+        """ Yield the response body in chunks as soon as they arrive
+
+        Streams are usually long-lived, so their connection is closed
+        afterwards instead of being returned to the pool.
+        """
+        response, conn = self._request(method, url, params, body)
+        try:
+            if response.chunked:
+                while True:
+                    size = int(response.fp.readline().split(';', 1)[0], 16)
+                    if size == 0:
+                        break
+                    chunk = response.fp.read(size)
+                    response.fp.read(2)
+                    yield chunk
+            else:
+                while True:
+                    chunk = response.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            conn.close()
+
+    def _stream_lines(self, method, url, params=None, body=None):
+        buf = ''
+        for chunk in self._stream(method, url, params, body):
+            lines = (buf + chunk).split('\n')
+            buf = lines.pop()
+            for line in lines:
+                yield line
+        if buf:
+            yield buf
+
+    def _demultiplex(self, stream):
+        """ Strip the headers docker puts in front of each frame of the
+        output of containers without a tty
+
+        Each frame starts with 8 bytes: the stream (0-2), three zero bytes
+        and the payload size. Output of tty containers is passed through.
+        """
+        buf = ''
+        multiplexed = None
+        for chunk in stream:
+            buf += chunk
+            if multiplexed is None:
+                if len(buf) < 8:
+                    continue
+                multiplexed = buf[0] in '\x00\x01\x02' and buf[1:4] == '\x00\x00\x00'
+            if not multiplexed:
+                yield buf
+                buf = ''
+                continue
+            frames, buf = split_frames(buf)
+            for _, payload in frames:
+                yield payload
+        if buf and not multiplexed:
+            yield buf
+
+    def containers(self, all=False, filters=None):
+        params = {'all': 1 if all else 0}
+        if filters:
+            params['filters'] = json.dumps(dict(
+                (key, values if isinstance(values, list) else [values])
+                for key, values in filters.iteritems()))
+        containers = self._call('GET', self._url('/containers/json'), params)
+
+        return [
+            {
+                'Command': container['Command'],
+                'Id':      container['Id'],
+                'Image':   container['Image'],
+                'Names':   container['Names'],
+                'Labels':  container.get('Labels') or {},
+                'Created': container['Created'],
+                'Status':  'EXITED' if container['Status'].startswith('Exited') else 'RUNNING',
+            }
+            for container in containers
+        ]
+
+    def run(self, image, detach=False, tty=False,
+            command=None, environment=None, name=None,
+            binds=None, port_bindings=None, links=None, labels=None):
+        binds = binds or {}
+        port_bindings = port_bindings or {}
+        body = {
+            'Image':     image,
+            'Tty':       tty,
+            'OpenStdin': tty,
+            'Env':       ['%s=%s' % item for item in (environment or {}).iteritems()],
+            'Labels':    labels or {},
+            'Volumes':   dict((bind['bind'], {}) for bind in binds.values()),
+            'ExposedPorts': dict(('%s/tcp' % port, {}) for port in port_bindings),
+            'HostConfig': {
+                'Binds': [
+                    '%s:%s:%s' % (host_dir, bind['bind'], 'ro' if bind['ro'] else 'rw')
+                    for host_dir, bind in binds.iteritems()
+                ],
+                'PortBindings': dict(
+                    ('%s/tcp' % port, [{'HostIp': ip_addr, 'HostPort': str(host_port)}])
+                    for port, (ip_addr, host_port) in port_bindings.iteritems()
+                ),
+                'Links': ['%s:%s' % item for item in (links or {}).iteritems()],
+            },
+        }
+        if command:
+            body['Cmd'] = command.split()
+        container = self._call('POST', self._url('/containers/create'), {'name': name} if name else None, body)
+
+        self._call('POST', self._url('/containers/{0}/start', container['Id']))
+
+        return container['Id']
+
+    def stop(self, container_id):
+        self._call('POST', self._url('/containers/{0}/stop', container_id))
+
+    def pull(self, image):
+        image, tag = split_image_and_tag(image)
+        for line in self._stream_lines('POST', self._url('/images/create'), {'fromImage': image, 'tag': tag}):
+            if not line.strip():
+                continue
+            json_msg = json.loads(line)
+            if 'error' in json_msg:
+                raise ClientException('Pulling %s:%s failed:' % (image, tag), json_msg['error'])
+            progress = '%s ' % json_msg['progress'] if 'progress' in json_msg else ''
+            status = json_msg.get('status', '')
+            logger.info('%s:%s: %s%s' % (image, tag, progress, status))
+
+    def image_digest(self, image):
+        """ Return the registry digest of the local image, or None if unknown """
+        try:
+            data = self._call('GET', self._url('/images/{0}/json', image))
+        except ClientException:
+            return None
+
+        return repo_digest(image, data.get('RepoDigests'))
+
+    def registry_digest(self, image):
+        """ Return the digest of the image in its registry, or None if unknown """
+        try:
+            return self._call('GET', self._url('/distribution/{0}/json', image))['Descriptor']['digest']
+        except (ClientException, KeyError, TypeError) as ex:
+            logger.debug('Could not get registry digest of %s: %s' % (image, ex))
+            return None
+
+    def logs(self, container_id, follow=False, tail=None, since=None, timestamps=False):
+        params = {
+            'stdout': 1,
+            'stderr': 1,
+            'follow': 1 if follow else 0,
+            'timestamps': 1 if timestamps else 0,
+            'tail': 'all' if tail is None else tail,
+        }
+        if since is not None:
+            params['since'] = since
+
+        return self._demultiplex(self._stream('GET', self._url('/containers/{0}/logs', container_id), params))
+
+    def stats(self, container_id, stream=True):
+        """ Yield samples of the resource usage of the running container,
+        one per second while `stream` is true """
+        url = self._url('/containers/{0}/stats', container_id)
+        if not stream:
+            yield stats_sample(self._call('GET', url, {'stream': 0}))
+            return
+        for line in self._stream_lines('GET', url, {'stream': 1}):
+            if line.startswith('{'):
+                yield stats_sample(json.loads(line))
+
+    def events(self, since=None):
+        """ Yield container events as dicts with the keys 'Id' and 'Action' """
+        params = {'filters': json.dumps({'type': ['container']})}
+        if since is not None:
+            params['since'] = since
+
+        for line in self._stream_lines('GET', self._url('/events'), params):
+            if not line.startswith('{'):
+                continue
+            event = json.loads(line)
+            if event.get('Type', 'container') == 'container' and 'id' in event:
+                yield {
+                    'Id':     event['id'],
+                    'Action': event.get('Action') or event['status'],
+                }
+
+    def execute(self, container_id, command):
+        """ Run `command` in the running container and return its exit code and output """
+        exec_id = self._call('POST', self._url('/containers/{0}/exec', container_id), body={
+            'AttachStdout': True,
+            'AttachStderr': True,
+            'Cmd': command.split(),
+        })['Id']
+        output = ''.join(self._demultiplex(self._stream('POST', self._url('/exec/{0}/start', exec_id),
+                                                        body={'Detach': False, 'Tty': False})))
+
+        return self._call('GET', self._url('/exec/{0}/json', exec_id))['ExitCode'], output
+
+    def exec_attach(self, container_id, command, tty=False, stdin=True):
+        """ Run `command`, a list, in the running container, connected to
+        the terminal, and return its exit code """
+        exec_id = self._call('POST', self._url('/containers/{0}/exec', container_id), body={
+            'AttachStdin': stdin,
+            'AttachStdout': True,
+            'AttachStderr': True,
+            'Tty': tty,
+            'Cmd': command,
+        })['Id']
+        # the daemon takes over the connection for the process' input and
+        # output; without buffering, no output is read along with the headers
+        response, conn = self._request('POST', self._url('/exec/{0}/start', exec_id),
+                                       body={'Detach': False, 'Tty': tty},
+                                       headers={'Connection': 'Upgrade', 'Upgrade': 'tcp'},
+                                       buffering=False)
+        if conn.sock is None:
+            raise ClientException('Could not attach to exec %s' % exec_id, 'the daemon closed the connection')
+        try:
+            attach(conn.sock, tty=tty, stdin=stdin)
+        finally:
+            conn.close()
+
+        return self._call('GET', self._url('/exec/{0}/json', exec_id))['ExitCode']
+
+    def inspect_container(self, container_id):
+        return self._call('GET', self._url('/containers/{0}/json', container_id))
+
+    def remove_container(self, container_id):
+        self._call('DELETE', self._url('/containers/{0}', container_id))
@@ -3,6 +3,11 @@ class ContainerException(Exception):
     pass
 
 
+class DependencyCycleException(ContainerException):
+    """ Exception thrown when the depends_on graph of the configs has a cycle """
+    pass
+
+
 class ClientException(Exception):
     def __init__(self, msg, inner=None):
         self.msg = msg
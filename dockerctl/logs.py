@@ -0,0 +1,151 @@
+from dockerctl.utils import interruptible_get
+import Queue
+import heapq
+import logging
+import re
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# lines buffered per container before its reader waits for the merge
+BUFFER_LINES = 1000
+# with --follow, lines are held back this many seconds so that lines of
+# other containers with earlier timestamps can still be sorted in front
+FOLLOW_WINDOW = 0.5
+
+TIMESTAMP_PATTERN = re.compile(r'^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?(\S*) ')
+
+
+def split_timestamp(line):
+    """ Split the timestamp docker puts in front of log lines off `line`
+
+    Returns a sort key for the timestamp and the rest of the line. Docker
+    drops trailing zeros of the fraction, so the fraction is padded for the
+    keys to sort correctly. The key is None if there is no timestamp.
+    """
+    mo = TIMESTAMP_PATTERN.match(line)
+    if not mo:
+        return None, line
+    seconds, fraction, zone = mo.groups()
+    return '%s.%s%s' % (seconds, (fraction or '')[:9].ljust(9, '0'), zone.replace('Z', '')), line[mo.end():]
+
+
+class LogReader(threading.Thread):
+    """ Reads the log stream of one container into a bounded queue
+
+    Puts (key, sequence number, line) tuples, and None at the end.
+    """
+
+    def __init__(self, container, container_id, lines, **options):
+        threading.Thread.__init__(self, name='logs-%s' % container.config.name)
+        self.daemon = True
+        self.container = container
+        self.container_id = container_id
+        self.lines = lines
+        self.options = options
+
+    def run(self):
+        key, sequence, buf = '', 0, ''
+        try:
+            for chunk in self.container.client.logs(self.container_id, timestamps=True, **self.options):
+                lines = (buf + chunk).split('\n')
+                buf = lines.pop()
+                for line in lines:
+                    key = split_timestamp(line)[0] or key
+                    sequence += 1
+                    self.lines.put((key, sequence, line + '\n'))
+            if buf:
+                self.lines.put((split_timestamp(buf)[0] or key, sequence + 1, buf + '\n'))
+        except Exception as ex:
+            logger.error('Reading the logs of %s failed: %s' % (self.container.config.name, ex))
+        finally:
+            self.lines.put(None)
+
+
+def merged_logs(containers, follow=False, tail=None, since=None, out=None):
+    """ Write the logs of all running `containers`, merged by timestamp
+
+    Each line is prefixed with the name of its container's config. All
+    log streams are read concurrently, and at most BUFFER_LINES lines per
+    container are held in memory.
+    """
+    out = out or sys.stdout
+    width = max(len(container.config.name) for container in containers)
+    readers = []
+    for container in containers:
+        container_id = container.get_runtime_id()
+        if container_id is None:
+            logger.warn('Container %s is not running' % container.config.name)
+            continue
+        lines = Queue.Queue(BUFFER_LINES)
+        readers.append(LogReader(container, container_id, lines, follow=follow, tail=tail, since=since))
+
+    prefixes = dict((reader.lines, '%-*s | ' % (width, reader.container.config.name)) for reader in readers)
+    for reader in readers:
+        reader.start()
+
+    merge = _merge_following if follow else _merge
+    for lines, line in merge([reader.lines for reader in readers]):
+        out.write(prefixes[lines] + split_timestamp(line)[1])
+        out.flush()
+
+
+def _merge(queues):
+    """ Yield (queue, line) in timestamp order, waiting for each queue
+    to either have a line or be finished """
+    heap = []
+    for i, lines in enumerate(queues):
+        _push_next(heap, i, lines)
+    while heap:
+        (key, i, sequence, line) = heapq.heappop(heap)
+        yield queues[i], line
+        _push_next(heap, i, queues[i])
+
+
+def _push_next(heap, i, lines):
+    item = interruptible_get(lines)
+    if item is not None:
+        key, sequence, line = item
+        heapq.heappush(heap, (key, i, sequence, line))
+
+
+def _merge_following(queues):
+    """ Yield (queue, line) roughly in timestamp order as lines arrive
+
+    Lines are reordered within a window of FOLLOW_WINDOW seconds, so live
+    output is only delayed by that much.
+    """
+    merged = Queue.Queue(BUFFER_LINES)
+    for i, lines in enumerate(queues):
+        thread = threading.Thread(target=_forward, args=(i, lines, merged), name='logs-merge-%d' % i)
+        thread.daemon = True
+        thread.start()
+
+    heap = []
+    active = len(queues)
+    while active or heap:
+        timeout = max(heap[0][4] + FOLLOW_WINDOW - time.time(), 0) if heap else 1
+        try:
+            item = merged.get(timeout=timeout)
+            if item[1] is None:
+                active -= 1
+            else:
+                i, (key, sequence, line) = item
+                heapq.heappush(heap, (key, i, sequence, line, time.time()))
+        except Queue.Empty:
+            pass
+
+        now = time.time()
+        while heap and (heap[0][4] + FOLLOW_WINDOW <= now or not active or len(heap) > BUFFER_LINES):
+            key, i, sequence, line, _ = heapq.heappop(heap)
+            yield queues[i], line
+
+
+def _forward(i, lines, merged):
+    while True:
+        item = lines.get()
+        merged.put((i, item))
+        if item is None:
+            return
@@ -0,0 +1,104 @@
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+import types
+
+
+class Profiler(object):
+    """ Records timed spans of dockerctl's work
+
+    Recording is off until `enabled` is set, so the spans cost next to
+    nothing in normal operation.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **args):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            duration = time.time() - start
+            with self._lock:
+                self.spans.append((name, start, duration, threading.current_thread().name, args))
+
+    def summary(self):
+        """ Return a table of the count, total and maximum time per span name """
+        stats = {}
+        for name, _, duration, _, _ in self.spans:
+            count, total, maximum = stats.get(name, (0, 0.0, 0.0))
+            stats[name] = (count + 1, total + duration, max(maximum, duration))
+
+        lines = ['%-36s %6s %10s %10s' % ('SPAN', 'COUNT', 'TOTAL', 'MAX')]
+        for name, (count, total, maximum) in sorted(stats.iteritems(), key=lambda item: -item[1][1]):
+            lines.append('%-36s %6d %9.3fs %9.3fs' % (name, count, total, maximum))
+
+        return '\n'.join(lines)
+
+    def write_trace(self, filename):
+        """ Write the spans in the Trace Event Format (chrome://tracing) """
+        pid = os.getpid()
+        events = [
+            {
+                'name': name,
+                'cat':  name.partition('.')[0],
+                'ph':   'X',
+                'ts':   int(start * 1e6),
+                'dur':  int(duration * 1e6),
+                'pid':  pid,
+                'tid':  thread_name,
+                'args': dict((key, str(value)) for key, value in args.iteritems()),
+            }
+            for name, start, duration, thread_name, args in self.spans
+        ]
+        with open(filename, 'w') as fd:
+            json.dump({'traceEvents': events}, fd)
+
+
+profiler = Profiler()
+
+
+def span(name, **args):
+    """ Record a span on the global profiler """
+    return profiler.span(name, **args)
+
+
+class InstrumentedClient(object):
+    """ Wraps a docker client and records a span for every method call
+
+    Streams returned by methods like `logs` are recorded for the whole
+    time they are consumed.
+    """
+
+    def __init__(self, docker_client, profiler=profiler):
+        self._client = docker_client
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def instrumented(*args, **kwargs):
+            with self._profiler.span('client.%s' % name):
+                result = attr(*args, **kwargs)
+            if isinstance(result, types.GeneratorType):
+                return self._stream(name, result)
+            return result
+
+        return instrumented
+
+    def _stream(self, name, stream):
+        with self._profiler.span('client.%s.stream' % name):
+            for item in stream:
+                yield item
@@ -0,0 +1,87 @@
+from dockerctl.utils import atomic_write, split_image_and_tag, parallel_map, DEFAULT_JOBS
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PullPlanner(object):
+    """ Pulls images at most once per invocation, and only if they are stale
+
+    An image is skipped if it was checked within its TTL (recorded in a
+    small cache file across invocations) or if its local digest matches the
+    registry's. Everything else is pulled concurrently on a bounded pool.
+    One planner is shared by all containers of an invocation, so images
+    used by several configs or dependencies are only pulled once.
+    """
+
+    CACHE_FILE = '/var/cache/dockerctl/pulls.json'
+
+    def __init__(self, docker_client, cache_file=CACHE_FILE, jobs=DEFAULT_JOBS):
+        self.client = docker_client
+        self.cache_file = cache_file
+        self.jobs = jobs
+        self.created_at = time.time()
+        self._checked = None
+        self._lock = threading.Lock()
+        self._image_locks = {}
+
+    def pull(self, images):
+        """ Pull the stale ones of `images`, a list of (image, ttl) tuples
+
+        Returns the list of images that were actually pulled.
+        """
+        ttls = {}
+        for image, ttl in images:
+            image = '%s:%s' % split_image_and_tag(image)
+            ttls[image] = min(ttl, ttls.get(image, ttl))
+
+        pulled = parallel_map(self._pull_image, sorted(ttls.iteritems()), self.jobs)
+
+        return [image for image in pulled if image]
+
+    def _pull_image(self, image_and_ttl):
+        image, ttl = image_and_ttl
+        with self._image_lock(image):
+            checked_at = self._get_checked().get(image)
+            if checked_at and (checked_at >= self.created_at or time.time() - checked_at < ttl):
+                logger.debug('Image %s is fresh, not pulling' % image)
+                return None
+
+            registry_digest = self.client.registry_digest(image)
+            if registry_digest and registry_digest == self.client.image_digest(image):
+                logger.info('Image %s is up to date' % image)
+                pulled = None
+            else:
+                logger.info('Pulling image %s' % image)
+                self.client.pull(image)
+                pulled = image
+
+            self._set_checked(image, time.time())
+
+        return pulled
+
+    def _image_lock(self, image):
+        with self._lock:
+            return self._image_locks.setdefault(image, threading.Lock())
+
+    def _get_checked(self):
+        with self._lock:
+            if self._checked is None:
+                try:
+                    with open(self.cache_file) as fd:
+                        self._checked = json.load(fd)
+                except (IOError, OSError, ValueError) as ex:
+                    logger.debug('Could not read pull cache %s: %s' % (self.cache_file, ex))
+                    self._checked = {}
+            return self._checked
+
+    def _set_checked(self, image, timestamp):
+        with self._lock:
+            self._checked[image] = timestamp
+            try:
+                atomic_write(self.cache_file, json.dumps(self._checked))
+            except (IOError, OSError) as ex:
+                logger.debug('Could not write pull cache %s: %s' % (self.cache_file, ex))
@@ -0,0 +1,107 @@
+from dockerctl.exceptions import ClientException, ContainerException
+import logging
+import re
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60
+DEFAULT_INTERVAL = 0.1
+
+
+def wait_until_ready(client, config, container_id):
+    """ Block until all probes of the config's `ready` section succeed
+
+    Supported probes are `tcp` (a container port accepting connections),
+    `log` (a regular expression matching a line of the container's output)
+    and `exec` (a command exiting with status 0 inside the container). A
+    `ContainerException` is raised if they don't succeed within `timeout`
+    seconds, or as soon as the container has exited.
+    """
+    ready = config.get('ready')
+    if not ready:
+        return
+
+    deadline = time.time() + ready.get('timeout', DEFAULT_TIMEOUT)
+    interval = ready.get('interval', DEFAULT_INTERVAL)
+
+    if 'log' in ready:
+        _wait_for_log(client, config, container_id, ready['log'], deadline, interval)
+    if 'tcp' in ready:
+        _wait_for_tcp(client, config, container_id, ready['tcp'], deadline, interval)
+    if 'exec' in ready:
+        _wait_for_exec(client, config, container_id, ready['exec'], deadline, interval)
+
+    logger.info('Container %s is ready' % config.name)
+
+
+def _wait_for_log(client, config, container_id, pattern, deadline, interval):
+    regex = re.compile(pattern)
+    since = [None]
+
+    def logged():
+        # the logs are read without following them, so nothing is left
+        # running if the container never logs the line; each read overlaps
+        # the previous one by a second, as `since` has second resolution
+        polled = int(time.time())
+        lines = ''.join(client.logs(container_id, since=since[0])).split('\n')
+        since[0] = polled - 1
+        return any(regex.search(line) for line in lines)
+
+    _poll(client, config, container_id, logged, deadline, interval,
+          'Container %s did not log a line matching %r in time' % (config.name, pattern))
+
+
+def _wait_for_tcp(client, config, container_id, port, deadline, interval):
+    address = {}
+
+    def accepts_connections():
+        if 'ip' not in address:
+            ip_address = (client.inspect_container(container_id).get('NetworkSettings') or {}).get('IPAddress')
+            if not ip_address:
+                return False
+            address['ip'] = ip_address
+        try:
+            socket.create_connection((address['ip'], port), max(interval, deadline - time.time())).close()
+            return True
+        except socket.error:
+            return False
+
+    _poll(client, config, container_id, accepts_connections, deadline, interval,
+          'Container %s did not accept connections on port %s in time' % (config.name, port))
+
+
+def _wait_for_exec(client, config, container_id, command, deadline, interval):
+    def succeeds():
+        exit_code, _ = client.execute(container_id, command)
+        return exit_code == 0
+
+    _poll(client, config, container_id, succeeds, deadline, interval,
+          'Readiness command %r of container %s did not succeed in time' % (command, config.name))
+
+
+def _poll(client, config, container_id, probe, deadline, interval, message):
+    """ Call `probe` every `interval` seconds until it returns true
+
+    Gives up with `message` at the deadline, and right away if the container
+    isn't running anymore.
+    """
+    while True:
+        try:
+            if probe():
+                return
+        except ClientException as ex:
+            logger.debug('Probe of container %s failed: %s' % (config.name, ex))
+        if not _is_running(client, container_id):
+            raise ContainerException('Container %s exited before it was ready' % config.name)
+        if time.time() + interval > deadline:
+            raise ContainerException(message)
+        time.sleep(interval)
+
+
+def _is_running(client, container_id):
+    try:
+        return client.inspect_container(container_id)['State']['Running']
+    except ClientException:
+        return False
@@ -0,0 +1,137 @@
+from dockerctl.container_config import ContainerConfig
+from dockerctl.exceptions import ContainerException, DependencyCycleException
+from dockerctl.utils import parallel_map, DEFAULT_JOBS
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyGraph(object):
+    """ The `depends_on` graph of a set of container configs
+
+    Cycles are detected when the graph is built. `run()` executes a function
+    for every node, one topological level at a time, with the nodes of a
+    level running concurrently.
+    """
+
+    def __init__(self, configs):
+        self.configs = dict((config.name, config) for config in configs)
+        self.depends_on = dict(
+            (name, list(config.get('depends_on', [])))
+            for name, config in self.configs.iteritems())
+        self.required_by = dict((name, []) for name in self.depends_on)
+        for name, dependencies in self.depends_on.iteritems():
+            for dependency in dependencies:
+                if dependency not in self.configs:
+                    raise ContainerException('Container %s depends on unknown container %s' % (name, dependency))
+                self.required_by[dependency].append(name)
+        self._check_cycles()
+
+    @classmethod
+    def for_names(cls, names):
+        """ Build the graph of `names` and their transitive dependencies,
+        reading every config only once """
+        configs = {}
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name not in configs:
+                configs[name] = ContainerConfig(name)
+                pending.extend(configs[name].get('depends_on', []))
+
+        return cls(configs.values())
+
+    def dependencies(self, name):
+        """ Return the names of all containers `name` depends on, transitively """
+        return self._reachable(name, self.depends_on)
+
+    def dependents(self, name):
+        """ Return the names of all containers depending on `name`, transitively """
+        return self._reachable(name, self.required_by)
+
+    def levels(self, names=None, reverse=False):
+        """ Group `names` (default: all nodes) into topological levels
+
+        Every node only depends on nodes in earlier levels. With `reverse`,
+        the levels are returned dependents first.
+        """
+        names = set(self.depends_on if names is None else names)
+        depth = {}
+
+        def node_depth(name):
+            if name not in depth:
+                depth[name] = 1 + max([node_depth(dependency)
+                                       for dependency in self.depends_on[name]
+                                       if dependency in names] or [-1])
+            return depth[name]
+
+        levels = []
+        for name in sorted(names):
+            level = node_depth(name)
+            while len(levels) <= level:
+                levels.append([])
+            levels[level].append(name)
+
+        return list(reversed(levels)) if reverse else levels
+
+    def run(self, fn, names=None, reverse=False, jobs=DEFAULT_JOBS, keep_going=False):
+        """ Call `fn(name)` once for each node in `names`, level by level
+
+        By default, an exception raised by `fn` is re-raised and no further
+        levels are run. With `keep_going`, exceptions are collected
+        instead, nodes that need a failed node are skipped, and a dict
+        mapping the names of failed and skipped nodes to exceptions is
+        returned.
+        """
+        blocked_by = self.required_by if reverse else self.depends_on
+        failures = {}
+
+        def call(name):
+            failed = [other for other in blocked_by[name] if other in failures]
+            if failed:
+                return name, ContainerException('Skipped container %s because %s failed' % (name, ', '.join(failed)))
+            try:
+                fn(name)
+                return name, None
+            except Exception as ex:
+                if not keep_going:
+                    raise
+                return name, ex
+
+        for level in self.levels(names, reverse=reverse):
+            logger.debug('Running %s on %s' % (fn.__name__, ', '.join(level)))
+            for name, ex in parallel_map(call, level, jobs):
+                if ex is not None:
+                    failures[name] = ex
+
+        return failures
+
+    def _reachable(self, name, edges):
+        reachable = set()
+        pending = list(edges[name])
+        while pending:
+            node = pending.pop()
+            if node not in reachable:
+                reachable.add(node)
+                pending.extend(edges[node])
+
+        return reachable
+
+    def _check_cycles(self):
+        visited = set()
+        path = []
+
+        def visit(name):
+            if name in path:
+                cycle = path[path.index(name):] + [name]
+                raise DependencyCycleException('Dependency cycle: %s' % ' -> '.join(cycle))
+            if name in visited:
+                return
+            path.append(name)
+            for dependency in self.depends_on[name]:
+                visit(dependency)
+            path.pop()
+            visited.add(name)
+
+        for name in sorted(self.depends_on):
+            visit(name)
@@ -0,0 +1,160 @@
+from dockerctl.container_index import LiveContainerIndex
+from dockerctl.state import StateStore
+import SocketServer
+import errno
+import json
+import logging
+import os
+import os.path
+import socket
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+SOCKET_PATH = '/run/dockerctl/dockerctl.sock'
+
+# Protocol: the client sends one JSON line {"argv": [...]}. The server
+# answers with JSON lines {"out": "..."} and {"err": "..."} carrying the
+# command's stdout and stderr, followed by a final {"exit": CODE}.
+
+
+class DockerctlServer(SocketServer.UnixStreamServer):
+    """ Executes dockerctl commands sent over a unix socket
+
+    The docker client, the parsed configs and an index of all containers,
+    kept current by the docker events stream, stay warm between requests.
+    Commands are executed one at a time, because they write to the
+    process-wide stdout and logging handlers.
+    """
+
+    def __init__(self, socket_path, docker_client, build_parser, execute, state=None):
+        self.docker_client = docker_client
+        self.snapshot = LiveContainerIndex(docker_client, state)
+        self.build_parser = build_parser
+        self.execute = execute
+        self.lock = threading.Lock()
+        SocketServer.UnixStreamServer.__init__(self, socket_path, RequestHandler)
+
+    def server_bind(self):
+        socket_dir = os.path.dirname(self.server_address)
+        if not os.path.isdir(socket_dir):
+            os.makedirs(socket_dir)
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        old_umask = os.umask(0177)
+        try:
+            SocketServer.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(old_umask)
+
+
+class RequestHandler(SocketServer.StreamRequestHandler):
+
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        out = _StreamWriter(self.wfile, 'out')
+        err = _StreamWriter(self.wfile, 'err')
+
+        with self.server.lock:
+            exit_code = self._execute(request['argv'], out, err)
+
+        self.wfile.write(json.dumps({'exit': exit_code}) + '\n')
+
+    def _execute(self, argv, out, err):
+        root_logger = logging.getLogger()
+        handler = logging.StreamHandler(err)
+        handler.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+        old_handlers, old_level = root_logger.handlers, root_logger.level
+        old_stdout, old_stderr = sys.stdout, sys.stderr
+        root_logger.handlers = [handler]
+        sys.stdout, sys.stderr = out, err
+        try:
+            args = self.server.build_parser().parse_args(argv)
+            root_logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
+            # record started containers where the forwarding process would
+            snapshot = self.server.snapshot
+            if snapshot.state is None or snapshot.state.state_dir != args.state_dir:
+                snapshot.state = StateStore(args.state_dir)
+            return self.server.execute(args, self.server.docker_client, self.server.snapshot)
+        except SystemExit as ex:
+            return ex.code
+        except Exception as ex:
+            logger.exception('Command %s failed' % ' '.join(argv))
+            return 3
+        finally:
+            sys.stdout, sys.stderr = old_stdout, old_stderr
+            root_logger.handlers = old_handlers
+            root_logger.setLevel(old_level)
+
+
+class _StreamWriter(object):
+    """ File-like object sending everything written to it as JSON lines """
+
+    def __init__(self, wfile, stream):
+        self.wfile = wfile
+        self.stream = stream
+
+    def write(self, data):
+        self.wfile.write(json.dumps({self.stream: data}) + '\n')
+
+    def flush(self):
+        self.wfile.flush()
+
+
+def serve(socket_path, docker_client, build_parser, execute, gc_interval=None, gc_keep=None, jobs=None, state=None):
+    """ Run the server until interrupted
+
+    With `gc_interval`, exited containers are also collected every
+    `gc_interval` seconds, between commands.
+    """
+    server = DockerctlServer(socket_path, docker_client, build_parser, execute, state)
+    server.snapshot.start()
+    if gc_interval:
+        from dockerctl.cleanup import collect_periodically
+        collect_periodically(docker_client, server.snapshot, gc_interval, keep=gc_keep, jobs=jobs, lock=server.lock)
+        logger.info('Collecting exited containers every %s seconds' % gc_interval)
+    logger.info('Listening on %s' % socket_path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+def forward(socket_path, argv, out=None, err=None):
+    """ Execute the command on a running dockerctl server, writing its
+    output to `out` and `err` (default: stdout and stderr)
+
+    Returns the command's exit code, or None if no server is running.
+    """
+    out = out or sys.stdout
+    err = err or sys.stderr
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except socket.error as ex:
+        sock.close()
+        if ex.errno in (errno.ENOENT, errno.ECONNREFUSED, errno.EACCES):
+            return None
+        raise
+
+    logger.debug('Forwarding command to dockerctl server at %s' % socket_path)
+    rfile = sock.makefile('rb')
+    try:
+        sock.sendall(json.dumps({'argv': argv}) + '\n')
+        for line in rfile:
+            message = json.loads(line)
+            if 'out' in message:
+                out.write(message['out'].encode('utf-8'))
+            elif 'err' in message:
+                err.write(message['err'].encode('utf-8'))
+            elif 'exit' in message:
+                return message['exit']
+    finally:
+        rfile.close()
+        sock.close()
+
+    return 3
@@ -0,0 +1,222 @@
+from dockerctl.exceptions import ClientException
+from dockerctl.utils import parse_datetime
+import calendar
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+NAME_PATTERN = re.compile(r'^/?(.*)-[a-zA-Z0-9_]+$')
+
+# labels dockerctl puts on the containers it starts
+CONFIG_LABEL = 'dockerctl.config'
+CONFIG_HASH_LABEL = 'dockerctl.config-hash'
+VERSION_LABEL = 'dockerctl.version'
+
+# with a state store, the containers of up to this many configs are looked
+# up by their recorded ids instead of with a listing of all containers
+STATE_LOOKUP_LIMIT = 4
+
+
+class ContainerSnapshot(object):
+    """ Container listings shared by all `Container`s of one dockerctl invocation
+
+    By default, the containers of a config are listed on first use with a
+    filter on the config label, so the docker daemon only returns the
+    matching rows. Containers started by older versions of dockerctl have
+    no labels; they are only looked for by name if no labelled container
+    of the config is found.
+    Commands that look at every config call `prefetch()` to get a single
+    listing of all containers instead. Listings are only refreshed after
+    `invalidate()` has been called, i.e. after dockerctl itself has stopped
+    or removed a container. Invalidating one config only drops its own
+    entry, so the other configs are still served from the listing. A
+    container dockerctl started is added with `started()` instead, so
+    starting a chain of dependencies doesn't list them again.
+    No lock is held while talking to the docker daemon.
+    With a `StateStore`, the running container of a config is looked up by
+    the id recorded when dockerctl started it, with a single inspect, and
+    only listed if there is no record or the container isn't running anymore.
+    """
+
+    def __init__(self, docker_client, state=None):
+        self.client = docker_client
+        self.state = state
+        self._index = None
+        # configs whose entries in _index are outdated
+        self._stale = set()
+        self._by_name = {}
+        # bumped on every invalidation, so listings that were already under
+        # way when it happened aren't stored
+        self._epoch = 0
+        self._versions = {}
+        self._without_legacy = set()
+        self._lock = threading.Lock()
+        self._prefetch_lock = threading.Lock()
+
+    def invalidate(self, config_name=None):
+        """ Drop the listings of `config_name`, or of all configs """
+        with self._lock:
+            if config_name is None:
+                self._index = None
+                self._stale = set()
+                self._by_name = {}
+                self._epoch += 1
+            else:
+                if self._index is not None and config_name not in self._stale and \
+                        all(CONFIG_LABEL in labels(c) for c in self._index.get(config_name, [])):
+                    # the listing showed there are no legacy containers
+                    self._without_legacy.add(config_name)
+                self._stale.add(config_name)
+                self._by_name.pop((config_name, True), None)
+                self._by_name.pop((config_name, False), None)
+                self._versions[config_name] = self._versions.get(config_name, 0) + 1
+
+    def started(self, config_name, container):
+        """ Add `container`, in the form of a listing, which dockerctl just
+        started for `config_name` """
+        with self._lock:
+            listings = [self._by_name.get((config_name, True)), self._by_name.get((config_name, False))]
+            if self._index is not None and config_name not in self._stale:
+                listings.append(self._index.setdefault(config_name, []))
+            # listings under way might not include the container yet
+            self._versions[config_name] = self._versions.get(config_name, 0) + 1
+            for containers in listings:
+                if containers is not None:
+                    containers.append(container)
+
+    def prefetch(self):
+        with self._prefetch_lock:
+            with self._lock:
+                if self._index is not None:
+                    return
+                epoch = self._epoch
+                # configs invalidated from now on are newer than the listing
+                self._stale = set()
+            index = self._build_index(self.client.containers(all=True))
+            with self._lock:
+                if self._epoch == epoch:
+                    self._index = index
+
+    def prefetch_for(self, config_names):
+        """ `prefetch()`, unless the containers of the few `config_names` can
+        be looked up in the state store instead """
+        if self.state is None or len(config_names) > STATE_LOOKUP_LIMIT:
+            self.prefetch()
+
+    def containers(self, config_name, only_running=True):
+        with self._lock:
+            containers = self._cached(config_name, only_running)
+            version = (self._epoch, self._versions.get(config_name, 0))
+        if containers is None:
+            containers = self._list(config_name, only_running)
+            with self._lock:
+                if (self._epoch, self._versions.get(config_name, 0)) == version:
+                    self._by_name[(config_name, only_running)] = containers
+
+        if only_running:
+            return [container for container in containers if container['Status'] != 'EXITED']
+        return list(containers)
+
+    def _cached(self, config_name, only_running):
+        if self._index is not None and config_name not in self._stale:
+            return self._index.get(config_name, [])
+        if (config_name, False) in self._by_name:
+            return self._by_name[(config_name, False)]
+        return self._by_name.get((config_name, only_running))
+
+    def record(self, config_name, container_id, name, config_hash):
+        """ Remember the instance dockerctl started for `config_name` """
+        if self.state is not None:
+            self.state.put(config_name, container_id, name, config_hash)
+
+    def forget(self, config_name, container_id):
+        """ Forget `container_id` after dockerctl stopped it """
+        if self.state is not None:
+            self.state.remove(config_name, container_id)
+
+    def _list(self, config_name, only_running):
+        if only_running and self.state is not None:
+            container = self._recorded(config_name)
+            if container is not None:
+                return [container]
+
+        containers = self._list_filtered({'label': '%s=%s' % (CONFIG_LABEL, config_name)}, only_running)
+        if not containers and config_name not in self._without_legacy:
+            containers = [
+                container
+                for container in self._list_filtered({'name': '^/?%s-' % re.escape(config_name)}, False)
+                if CONFIG_LABEL not in labels(container)
+            ]
+            # dockerctl doesn't create containers without labels anymore, so
+            # once a config has none, there's no need to look for them again
+            if not containers:
+                self._without_legacy.add(config_name)
+
+        return self._build_index(containers).get(config_name, [])
+
+    def _recorded(self, config_name):
+        """ Return the running container recorded for `config_name`, in the
+        form of a listing, or None if there is no record or it is stale """
+        record = self.state.get(config_name)
+        if record is None:
+            return None
+        try:
+            data = self.client.inspect_container(record['Id'])
+        except ClientException:
+            data = None
+        if data is None or not data['State']['Running'] or labels(data.get('Config') or {}).get(CONFIG_LABEL) != config_name:
+            logger.debug('Recorded container %s of %s is gone' % (record['Id'], config_name))
+            self.state.remove(config_name, record['Id'])
+            return None
+
+        return listed(data)
+
+    def _list_filtered(self, filters, only_running):
+        if only_running:
+            filters['status'] = 'running'
+
+        return self.client.containers(all=not only_running, filters=filters)
+
+    def _build_index(self, containers):
+        index = {}
+        for container in containers:
+            for config_name in set(config_names(container)):
+                index.setdefault(config_name, []).append(container)
+        return index
+
+
+def labels(container):
+    return container.get('Labels') or {}
+
+
+def listed(data):
+    """ Convert the result of inspecting a running container to the form
+    of container listings """
+    return {
+        'Command': ' '.join([data['Path']] + data['Args']),
+        'Created': calendar.timegm(parse_datetime(data['Created']).timetuple()),
+        'Id':      data['Id'],
+        'Image':   data['Config'].get('Image', data['Image']),
+        'Labels':  labels(data['Config']),
+        'Names':   [data['Name']],
+        'Status':  'RUNNING',
+    }
+
+
+def config_names(container):
+    """ Yield the config names a container belongs to
+
+    That's the config label of containers started by dockerctl. For legacy
+    containers without labels, it's what their names map to.
+    """
+    config_name = labels(container).get(CONFIG_LABEL)
+    if config_name is not None:
+        yield config_name
+        return
+
+    for name in container['Names']:
+        mo = NAME_PATTERN.match(name)
+        if mo:
+            yield mo.group(1)
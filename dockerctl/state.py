@@ -0,0 +1,69 @@
+from dockerctl.utils import atomic_write
+from contextlib import contextmanager
+import errno
+import fcntl
+import json
+import logging
+import os
+import os.path
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR = '/run/dockerctl'
+
+
+class StateStore(object):
+    """ The id, name and config hash of the instance dockerctl started last
+    for each config, one small JSON file per config in `state_dir`
+
+    Records are replaced atomically, so they can be read without locking.
+    Changes take an exclusive lock on a lock file per config, so concurrent
+    dockerctl processes don't remove each other's records. The store is only
+    a hint: a record may be stale, and if `state_dir` isn't writable, nothing
+    is recorded.
+    """
+
+    def __init__(self, state_dir=STATE_DIR):
+        self.state_dir = state_dir
+
+    def get(self, config_name):
+        try:
+            with open(self._path(config_name)) as fd:
+                return json.load(fd)
+        except (IOError, OSError, ValueError) as ex:
+            if getattr(ex, 'errno', None) != errno.ENOENT:
+                logger.debug('Could not read state of %s: %s' % (config_name, ex))
+            return None
+
+    def put(self, config_name, container_id, name, config_hash):
+        record = {'Id': container_id, 'Name': name, 'ConfigHash': config_hash}
+        try:
+            with self._locked(config_name):
+                atomic_write(self._path(config_name), json.dumps(record))
+        except (IOError, OSError) as ex:
+            logger.debug('Could not write state of %s: %s' % (config_name, ex))
+
+    def remove(self, config_name, container_id):
+        """ Remove the record of `config_name` if it is still the one of
+        `container_id` """
+        try:
+            with self._locked(config_name):
+                record = self.get(config_name)
+                if record is not None and record['Id'] == container_id:
+                    os.unlink(self._path(config_name))
+        except (IOError, OSError) as ex:
+            logger.debug('Could not remove state of %s: %s' % (config_name, ex))
+
+    @contextmanager
+    def _locked(self, config_name):
+        if not os.path.isdir(self.state_dir):
+            os.makedirs(self.state_dir, 0755)
+        with open(os.path.join(self.state_dir, '.%s.lock' % config_name), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _path(self, config_name):
+        return os.path.join(self.state_dir, '%s.json' % config_name)
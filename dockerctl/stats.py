@@ -0,0 +1,158 @@
+from dockerctl.utils import atomic_write, parallel_map, DEFAULT_JOBS
+from dockerctl.watch import CURSOR_UP, CLEAR_LINE
+from collections import OrderedDict
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = 1
+DEFAULT_TEXTFILE_INTERVAL = 15
+
+# (key of the samples, metric name, metric type, help)
+METRICS = [
+    ('Containers',  'dockerctl_containers',                  'gauge',   'Number of running containers'),
+    ('CPUPercent',  'dockerctl_cpu_percent',                 'gauge',   'CPU usage in percent of one CPU'),
+    ('MemoryUsage', 'dockerctl_memory_usage_bytes',          'gauge',   'Memory usage without the page cache'),
+    ('MemoryLimit', 'dockerctl_memory_limit_bytes',          'gauge',   'Memory limit'),
+    ('NetworkRx',   'dockerctl_network_receive_bytes_total', 'counter', 'Bytes received on all networks'),
+    ('NetworkTx',   'dockerctl_network_transmit_bytes_total', 'counter', 'Bytes sent on all networks'),
+    ('BlockRead',   'dockerctl_block_read_bytes_total',      'counter', 'Bytes read from block devices'),
+    ('BlockWrite',  'dockerctl_block_write_bytes_total',     'counter', 'Bytes written to block devices'),
+]
+
+SAMPLE_KEYS = [key for key, _, _, _ in METRICS if key != 'Containers']
+
+
+class StatsCollector(object):
+    """ Keeps the latest resource usage sample of the running containers of
+    a set of configs
+
+    The containers are looked up once, from one listing; containers started
+    later are not picked up.
+    """
+
+    def __init__(self, docker_client, snapshot, names):
+        snapshot.prefetch()
+        self.client = docker_client
+        self.names = sorted(names)
+        self.config_names = dict(
+            (container['Id'], name)
+            for name in self.names
+            for container in snapshot.containers(name))
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def sample(self, jobs=DEFAULT_JOBS):
+        """ Take one sample of every container, on at most `jobs` threads """
+        def sample_one(container_id):
+            try:
+                return container_id, next(iter(self.client.stats(container_id, stream=False)), None)
+            except Exception as ex:
+                logger.warn('Reading the stats of container %s failed: %s' % (container_id, ex))
+                return container_id, None
+
+        with self._lock:
+            for container_id, sample in parallel_map(sample_one, self.config_names, jobs):
+                if sample is not None:
+                    self._samples[container_id] = sample
+
+    def start(self):
+        """ Stream the stats of every container in a daemon thread each """
+        for container_id in self.config_names:
+            thread = threading.Thread(target=self._stream, args=(container_id,), name='stats-%s' % container_id[:12])
+            thread.daemon = True
+            thread.start()
+
+    def _stream(self, container_id):
+        try:
+            for sample in self.client.stats(container_id):
+                with self._lock:
+                    self._samples[container_id] = sample
+        except Exception as ex:
+            logger.warn('Reading the stats of container %s failed: %s' % (container_id, ex))
+        finally:
+            # the stream ends when the container stops
+            with self._lock:
+                self._samples.pop(container_id, None)
+
+    def totals(self):
+        """ Return the sums of the latest samples of each config's containers,
+        by config name """
+        totals = OrderedDict((name, dict.fromkeys(SAMPLE_KEYS + ['Containers'], 0)) for name in self.names)
+        with self._lock:
+            for container_id, sample in self._samples.iteritems():
+                total = totals[self.config_names[container_id]]
+                total['Containers'] += 1
+                for key in SAMPLE_KEYS:
+                    total[key] += sample[key]
+
+        return totals
+
+
+def format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            return '%.4g%s' % (size, unit)
+        size /= 1024.0
+    return '%.4g%s' % (size, 'TiB')
+
+
+def stats_lines(totals):
+    """ Format a table row per config, with a header """
+    width = max([len('CONFIG')] + [len(name) for name in totals])
+    row = '%%-%ds  %%10s  %%7s  %%21s  %%21s  %%21s' % width
+    lines = [row % ('CONFIG', 'CONTAINERS', 'CPU %', 'MEM USAGE / LIMIT', 'NET I/O', 'BLOCK I/O')]
+    for name, total in totals.iteritems():
+        lines.append(row % (
+            name,
+            total['Containers'],
+            '%.2f%%' % total['CPUPercent'],
+            '%s / %s' % (format_size(total['MemoryUsage']), format_size(total['MemoryLimit'])),
+            '%s / %s' % (format_size(total['NetworkRx']), format_size(total['NetworkTx'])),
+            '%s / %s' % (format_size(total['BlockRead']), format_size(total['BlockWrite']))))
+
+    return lines
+
+
+def prometheus_text(totals):
+    """ Format `totals` in the Prometheus text exposition format, labeled by config """
+    lines = []
+    for key, metric, metric_type, help in METRICS:
+        lines.append('# HELP %s %s' % (metric, help))
+        lines.append('# TYPE %s %s' % (metric, metric_type))
+        for name, total in totals.iteritems():
+            label = name.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            lines.append('%s{config="%s"} %s' % (metric, label, total[key]))
+
+    return ''.join(line + '\n' for line in lines)
+
+
+def write_textfile(path, text):
+    """ Replace `path` with `text` atomically, so that readers like the
+    textfile collector of the node exporter never see a partial file """
+    atomic_write(path, text, 0644)
+
+
+def show_stats(collector, out=None, table=True, textfile=None, textfile_interval=DEFAULT_TEXTFILE_INTERVAL):
+    """ Stream the stats of the containers of `collector`, repainting a table
+    of the totals every REFRESH_INTERVAL seconds if `table` is true and
+    writing them to `textfile` every `textfile_interval` seconds, until
+    interrupted """
+    out = out or sys.stdout
+    collector.start()
+    shown = 0
+    next_write = time.time() + REFRESH_INTERVAL
+    while True:
+        time.sleep(REFRESH_INTERVAL)
+        totals = collector.totals()
+        if table:
+            lines = stats_lines(totals)
+            out.write((CURSOR_UP % shown if shown else '') + ''.join(CLEAR_LINE + line + '\n' for line in lines))
+            out.flush()
+            shown = len(lines)
+        if textfile and time.time() >= next_write:
+            write_textfile(textfile, prometheus_text(totals))
+            next_write += textfile_interval
@@ -0,0 +1,160 @@
+from dockerctl.exceptions import ContainerException, ClientException
+from dockerctl.utils import parallel_imap, pretty_date, parse_datetime, DEFAULT_JOBS
+from collections import namedtuple, OrderedDict
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def status_reports(containers, jobs=DEFAULT_JOBS):
+    """ Yield the formatted status of each container, in the given order
+
+    The runtime ids of all containers are resolved from one shared listing
+    first; only the running containers are then inspected, on a pool of at
+    most `jobs` worker threads.
+    """
+    runtime_ids = [(container, container.get_runtime_id()) for container in containers]
+
+    for report in parallel_imap(_status_report, runtime_ids, jobs):
+        yield report
+
+
+def _status_report(container_and_id):
+    container, container_id = container_and_id
+    data = _inspect(container, container_id) if container_id else None
+
+    return container.format_status(data)
+
+
+def _inspect(container, container_id):
+    """ Inspect the container, or return None if it has been removed since
+    it was listed """
+    try:
+        return container.client.inspect_container(container_id)
+    except ClientException as ex:
+        logger.debug('Container %s of %s is gone: %s' % (container_id, container.config.name, ex))
+        return None
+
+
+def format_ports(data):
+    return [
+        '%s:%s -> %s' % (port['HostIp'] if port['HostIp'] else '*', port['HostPort'], container_port)
+        for container_port, ports in ((data['NetworkSettings'] or {}).get('Ports') or {}).iteritems()
+        for port in (ports if ports else [])
+    ]
+
+
+def format_volumes(data):
+    return [
+        '%s -> %s %s' % (host_dir, container_dir, '' if data['VolumesRW'][host_dir] else '[read-only]')
+        for host_dir, container_dir in (data.get('Volumes') or {}).iteritems()
+    ]
+
+
+# `get` is called with the container, its current entry of the listing (or
+# None), its state and, only for fields with `inspect` set, the result of
+# inspecting it if it is running (or None)
+Field = namedtuple('Field', ['header', 'width', 'inspect', 'get'])
+
+FIELDS = OrderedDict([
+    ('container', Field('CONTAINER', 24, False, lambda container, listed, state, data: container.config.name)),
+    ('state',     Field('STATE', 12, False, lambda container, listed, state, data: state)),
+    ('id',        Field('ID', 12, False, lambda container, listed, state, data: listed['Id'][:12] if listed else '')),
+    ('name',      Field('NAME', 24, False, lambda container, listed, state, data:
+                        container.matching_name(listed, container.config.name)[1:] if listed else '')),
+    ('image',     Field('IMAGE', 24, False, lambda container, listed, state, data: listed['Image'] if listed else '')),
+    ('command',   Field('COMMAND', 32, False, lambda container, listed, state, data: listed['Command'] if listed else '')),
+    ('created',   Field('CREATED', 16, True, lambda container, listed, state, data:
+                        pretty_date(parse_datetime(data['Created'])) if data else '')),
+    ('started',   Field('STARTED', 16, True, lambda container, listed, state, data:
+                        pretty_date(parse_datetime(data['State']['StartedAt'])) if data else '')),
+    ('ip',        Field('IP ADDRESS', 16, True, lambda container, listed, state, data:
+                        data['NetworkSettings']['IPAddress'] if data else '')),
+    ('ports',     Field('PORTS', 32, True, lambda container, listed, state, data: format_ports(data) if data else [])),
+    ('volumes',   Field('VOLUMES', 32, True, lambda container, listed, state, data: format_volumes(data) if data else [])),
+])
+
+BRIEF_FIELDS = ['container', 'state', 'id', 'name']
+TABLE_FIELDS = ['container', 'state', 'id', 'name', 'started', 'ip', 'ports']
+
+
+def parse_fields(fields):
+    """ Parse a comma separated list of field names """
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    for name in names:
+        if name not in FIELDS:
+            raise ContainerException('Unknown status field %s, choose from %s' % (name, ', '.join(FIELDS)))
+
+    return names
+
+
+def listing_state(container):
+    """ Return the state of a container and its current entry of the
+    listing, from the listing alone """
+    containers = container.get_containers_by_image_name(container.config.name, only_running=False)
+    running = [c for c in containers if c['Status'] != 'EXITED']
+    if running:
+        return 'running', running[0]
+    elif containers:
+        return 'exited', max(containers, key=lambda c: c.get('Created', 0))
+    else:
+        return 'not running', None
+
+
+def status_rows(containers, fields, jobs=DEFAULT_JOBS):
+    """ Yield a dict with the values of `fields` for each container, in order
+
+    Containers are only inspected if one of the fields needs it, and only
+    if they are running. Otherwise the shared listing is all it takes.
+    """
+    inspect = any(FIELDS[name].inspect for name in fields)
+
+    def status_row(container):
+        state, listed = listing_state(container)
+        data = None
+        if inspect and state == 'running':
+            data = _inspect(container, listed['Id'])
+            if data is None:
+                state, listed = 'not running', None
+
+        return OrderedDict((name, FIELDS[name].get(container, listed, state, data)) for name in fields)
+
+    return parallel_imap(status_row, containers, jobs if inspect else 1)
+
+
+def table_row(values, fields):
+    """ Format the values of `fields` as one line of a table """
+    columns = [', '.join(value) if isinstance(value, list) else value for value in values]
+    padded = ['%-*s' % (FIELDS[name].width, column) for name, column in zip(fields[:-1], columns[:-1])]
+
+    return ' '.join(padded + columns[-1:])
+
+
+def header_row(fields):
+    return table_row([FIELDS[name].header for name in fields], fields)
+
+
+def status_lines(containers, format='table', brief=False, jobs=DEFAULT_JOBS):
+    """ Yield the status of `containers` line by line as soon as it's known
+
+    `format` is 'table', 'json' (one object per line) or a comma separated
+    list of fields to show as a table. `brief` restricts table and json to
+    the fields available from the listing.
+    """
+    if format == 'json':
+        fields = BRIEF_FIELDS if brief else list(FIELDS)
+    elif format == 'table':
+        fields = BRIEF_FIELDS if brief else TABLE_FIELDS
+    else:
+        fields = parse_fields(format)
+        if not fields:
+            raise ContainerException('No status fields given')
+
+    if format != 'json':
+        yield header_row(fields)
+    for row in status_rows(containers, fields, jobs):
+        if format == 'json':
+            yield json.dumps(row)
+        else:
+            yield table_row(row.values(), fields)
@@ -0,0 +1,79 @@
+import os
+import select
+import socket
+import struct
+import sys
+import termios
+import tty as tty_mode
+
+CHUNK_SIZE = 64 * 1024
+
+
+def split_frames(buf):
+    """ Split the complete frames off the start of `buf`
+
+    Docker sends the output of processes without a tty as frames of an
+    8 byte header, holding the stream (0-2) and the payload size, followed
+    by the payload. Returns a list of (stream, payload) tuples and the
+    incomplete rest of `buf`.
+    """
+    frames = []
+    while len(buf) >= 8:
+        stream, size = struct.unpack('>BxxxI', buf[:8])
+        if len(buf) < 8 + size:
+            break
+        frames.append((stream, buf[8:8 + size]))
+        buf = buf[8 + size:]
+
+    return frames, buf
+
+
+def attach(sock, tty=False, stdin=True):
+    """ Connect the terminal to `sock`, the connection to a process in a
+    container, until the process closes it
+
+    With `tty`, the local terminal is put into raw mode for the time being
+    and output is passed through as is; otherwise it is demultiplexed onto
+    stdout and stderr.
+    """
+    stdin_fd = sys.stdin.fileno()
+    saved_mode = None
+    if tty and stdin and os.isatty(stdin_fd):
+        saved_mode = termios.tcgetattr(stdin_fd)
+        tty_mode.setraw(stdin_fd)
+    try:
+        _pump(sock, stdin_fd if stdin else None, multiplexed=not tty)
+    finally:
+        if saved_mode is not None:
+            termios.tcsetattr(stdin_fd, termios.TCSADRAIN, saved_mode)
+
+
+def _pump(sock, stdin_fd, multiplexed):
+    outputs = {1: sys.stdout.fileno(), 2: sys.stderr.fileno()}
+    inputs = [sock] + ([stdin_fd] if stdin_fd is not None else [])
+    buf = ''
+    while True:
+        readable, _, _ = select.select(inputs, [], [])
+        if sock in readable:
+            data = sock.recv(CHUNK_SIZE)
+            if not data:
+                break
+            if multiplexed:
+                frames, buf = split_frames(buf + data)
+                for stream, payload in frames:
+                    _write_all(outputs.get(stream, outputs[1]), payload)
+            else:
+                _write_all(outputs[1], data)
+        if stdin_fd in readable:
+            data = os.read(stdin_fd, CHUNK_SIZE)
+            if data:
+                sock.sendall(data)
+            else:
+                # let the process see the end of its input
+                sock.shutdown(socket.SHUT_WR)
+                inputs.remove(stdin_fd)
+
+
+def _write_all(fd, data):
+    while data:
+        data = data[os.write(fd, data):]
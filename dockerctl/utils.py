@@ -1,5 +1,13 @@
+import Queue
+import calendar
 import datetime
+import os
+import os.path
 import re
+import sys
+import tempfile
+import threading
+import time
 
 
 def pretty_date(time=False):
@@ -47,8 +55,171 @@ def pretty_date(time=False):
 def parse_datetime(s):
     return datetime.datetime(*map(int, re.split('[^\d]', s)[:-2]))
 
+def parse_created_at(s):
+    """ Parse a date like '2014-05-01 12:00:00 +0200 CEST', as shown by
+    `docker ps`, into a Unix timestamp """
+    date, time_of_day, offset = s.split()[:3]
+    timestamp = calendar.timegm(time.strptime('%s %s' % (date, time_of_day), '%Y-%m-%d %H:%M:%S'))
+    sign = -1 if offset[0] == '-' else 1
+    return timestamp - sign * (int(offset[1:3]) * 3600 + int(offset[3:5]) * 60)
+
 def split_image_and_tag(image_and_tag):
     image, _, tag = image_and_tag.partition(':')
     if not tag:
         tag = 'latest'
     return image, tag
+
+def parse_since(since, now=None):
+    """
+    Parse a `--since` argument into a Unix timestamp. Accepts timestamps,
+    durations relative to now like '30s', '10m', '2h' or '1d', and
+    datetimes like '2014-05-01' or '2014-05-01T12:30:00' (UTC).
+    """
+    if re.match(r'^\d+$', since):
+        return int(since)
+
+    mo = re.match(r'^(\d+)([smhd])$', since)
+    if mo:
+        now = now or time.time()
+        seconds = int(mo.group(1)) * {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[mo.group(2)]
+        return int(now) - seconds
+
+    for fmt in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return calendar.timegm(time.strptime(since, fmt))
+        except ValueError:
+            pass
+
+    raise ValueError('Invalid time: %s' % since)
+
+def repo_digest(image, repo_digests):
+    """ Return the digest for `image` from a list of 'repository@digest' strings """
+    repository, _ = split_image_and_tag(image)
+    for entry in repo_digests or []:
+        entry_repository, _, digest = entry.partition('@')
+        if entry_repository == repository:
+            return digest
+    return None
+
+SIZE_UNITS = {
+    'b': 1,
+    'kb': 1000, 'mb': 1000 ** 2, 'gb': 1000 ** 3, 'tb': 1000 ** 4,
+    'kib': 1024, 'mib': 1024 ** 2, 'gib': 1024 ** 3, 'tib': 1024 ** 4,
+}
+
+def parse_size(s):
+    """ Parse a size like '1.5MiB' or '648B', as shown by `docker stats`,
+    into bytes """
+    mo = re.match(r'^\s*([\d.]+)\s*([a-zA-Z]*)\s*$', s)
+    if not mo or mo.group(2).lower() not in SIZE_UNITS:
+        raise ValueError('Invalid size: %s' % s)
+    return int(float(mo.group(1)) * SIZE_UNITS[mo.group(2).lower()])
+
+def stats_sample(stats):
+    """ Reduce the stats the docker API reports for a container to the
+    numbers `docker stats` shows
+
+    The CPU percentage is computed from the difference to the previous
+    sample docker includes, and is 0 for the first one.
+    """
+    cpu, precpu = stats.get('cpu_stats') or {}, stats.get('precpu_stats') or {}
+    cpu_delta = cpu.get('cpu_usage', {}).get('total_usage', 0) - precpu.get('cpu_usage', {}).get('total_usage', 0)
+    system_delta = cpu.get('system_cpu_usage', 0) - precpu.get('system_cpu_usage', 0)
+    cpus = cpu.get('online_cpus') or len(cpu.get('cpu_usage', {}).get('percpu_usage') or []) or 1
+    cpu_percent = 100.0 * cpu_delta / system_delta * cpus if cpu_delta > 0 and system_delta > 0 else 0.0
+
+    memory = stats.get('memory_stats') or {}
+    networks = (stats.get('networks') or {}).values() or [stats.get('network') or {}]
+    block_io = (stats.get('blkio_stats') or {}).get('io_service_bytes_recursive') or []
+
+    return {
+        'CPUPercent':  cpu_percent,
+        # like `docker stats`, don't count the page cache
+        'MemoryUsage': memory.get('usage', 0) - (memory.get('stats') or {}).get('cache', 0),
+        'MemoryLimit': memory.get('limit', 0),
+        'NetworkRx':   sum(network.get('rx_bytes', 0) for network in networks),
+        'NetworkTx':   sum(network.get('tx_bytes', 0) for network in networks),
+        'BlockRead':   sum(entry['value'] for entry in block_io if entry.get('op', '').lower() == 'read'),
+        'BlockWrite':  sum(entry['value'] for entry in block_io if entry.get('op', '').lower() == 'write'),
+    }
+
+DEFAULT_JOBS = 8
+
+def parallel_map(fn, items, jobs=DEFAULT_JOBS):
+    """ Call `fn` for each of `items` on at most `jobs` threads and return
+    the results in order """
+    return list(parallel_imap(fn, items, jobs))
+
+def parallel_imap(fn, items, jobs=DEFAULT_JOBS):
+    """
+    Call `fn` for each of `items` on at most `jobs` threads and yield the
+    results in order as soon as they are available. An exception raised by
+    `fn` is re-raised when its result is due.
+    """
+    items = list(items)
+    if jobs <= 1 or len(items) <= 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    tasks = Queue.Queue()
+    for task in enumerate(items):
+        tasks.put(task)
+    finished = Queue.Queue()
+
+    def worker():
+        while True:
+            try:
+                i, item = tasks.get_nowait()
+            except Queue.Empty:
+                return
+            try:
+                result = (True, fn(item))
+            except Exception:
+                result = (False, sys.exc_info())
+            finished.put((i, result))
+
+    for _ in range(min(jobs, len(items))):
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+
+    results = {}
+    for i in range(len(items)):
+        while i not in results:
+            j, result = interruptible_get(finished)
+            results[j] = result
+        ok, value = results.pop(i)
+        if not ok:
+            raise value[0], value[1], value[2]
+        yield value
+
+def interruptible_get(queue):
+    """ Wait for the next item of `queue` and return it
+
+    Python 2 doesn't deliver KeyboardInterrupt to a thread blocked in a
+    wait without timeout, so this waits for at most a second at a time.
+    """
+    while True:
+        try:
+            return queue.get(timeout=1)
+        except Queue.Empty:
+            pass
+
+def atomic_write(path, data, mode=0600):
+    """ Replace `path` with `data` atomically, so that readers never see a
+    partial file, creating its directory if needed """
+    directory = os.path.dirname(path) or '.'
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, tmp_path = tempfile.mkstemp(prefix='.%s.' % os.path.basename(path), dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.chmod(tmp_path, mode)
+        os.rename(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
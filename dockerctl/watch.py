@@ -0,0 +1,52 @@
+from dockerctl.status import FIELDS, BRIEF_FIELDS, header_row, listing_state, table_row
+from dockerctl.utils import interruptible_get
+import Queue
+import sys
+
+CURSOR_UP = '\x1b[%dA'
+CURSOR_DOWN = '\x1b[%dB'
+CLEAR_LINE = '\r\x1b[K'
+
+
+def status_row(container):
+    """ Format one line of status from the container listing alone """
+    state, listed = listing_state(container)
+
+    return table_row([FIELDS[name].get(container, listed, state, None) for name in BRIEF_FIELDS], BRIEF_FIELDS)
+
+
+def watch_status(containers, index, out=None):
+    """ Show one status row per container and repaint the rows that change
+
+    `index` is a `LiveContainerIndex`; rows are only recomputed when the
+    index reports a change for their config.
+    """
+    out = out or sys.stdout
+    changes = Queue.Queue()
+    index.subscribe(changes.put)
+    index.start()
+
+    rows = [status_row(container) for container in containers]
+    positions = dict((container.config.name, i) for i, container in enumerate(containers))
+    out.write(header_row(BRIEF_FIELDS) + '\n')
+    out.write(''.join(row + '\n' for row in rows))
+    out.flush()
+
+    try:
+        while True:
+            changed = set(interruptible_get(changes))
+            while not changes.empty():
+                changed.update(changes.get())
+
+            for config_name in changed:
+                if config_name not in positions:
+                    continue
+                i = positions[config_name]
+                row = status_row(containers[i])
+                if row != rows[i]:
+                    rows[i] = row
+                    lines_up = len(rows) - i
+                    out.write(CURSOR_UP % lines_up + CLEAR_LINE + row + CURSOR_DOWN % lines_up + '\r')
+            out.flush()
+    except KeyboardInterrupt:
+        pass
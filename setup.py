@@ -17,5 +17,7 @@ setup(name='dockerctl',
       author_email='dockerctl@fqxp.de',
       url='https://github.com/fqxp/dockerctl',
       packages=['dockerctl'],
-      scripts=['bin/dockerctl'],
+      entry_points={
+          'console_scripts': ['dockerctl = dockerctl.cli:main'],
+      },
       )
@@ -0,0 +1,141 @@
+from dockerctl.exceptions import ClientException
+from collections import defaultdict
+import re
+import time
+
+
+class FakeDockerClient(object):
+    """ In-memory stand-in implementing the `DockerPyClient` interface
+
+    Every method call is counted in `calls` and sleeps `latency` seconds to
+    simulate the round trip to the docker daemon.
+    """
+
+    def __init__(self, containers=(), latency=0.0, log_lines=1000):
+        self.latency = latency
+        self.log_lines = log_lines
+        self.calls = defaultdict(int)
+        self._containers = dict((c['Id'], dict(c)) for c in containers)
+        self._next_id = 0
+
+    def _call(self, method):
+        self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def containers(self, all=False, filters=None):
+        self._call('containers')
+        filters = filters or {}
+        result = []
+        for container in sorted(self._containers.values(), key=lambda c: c['Id']):
+            if not all and container['Status'] == 'EXITED':
+                continue
+            if 'status' in filters and (container['Status'] == 'EXITED') != (filters['status'] == 'exited'):
+                continue
+            if 'name' in filters and not any(re.search(filters['name'], name) for name in container['Names']):
+                continue
+            if 'id' in filters and not container['Id'].startswith(filters['id']):
+                continue
+            if 'label' in filters and not self._has_label(container, filters['label']):
+                continue
+            result.append(dict(container))
+        return result
+
+    def run(self, image, detach=False, tty=False,
+            command=None, environment=None, name=None,
+            binds=None, port_bindings=None, links=None, labels=None):
+        self._call('run')
+        self._next_id += 1
+        container_id = 'fake%060d' % self._next_id
+        self._containers[container_id] = {
+            'Command': command or '',
+            'Id':      container_id,
+            'Image':   image,
+            'Names':   ['/%s' % name],
+            'Labels':  dict(labels or {}),
+            'Created': int(time.time()),
+            'Status':  'RUNNING',
+        }
+        return container_id
+
+    def stop(self, container_id):
+        self._call('stop')
+        self._get(container_id)['Status'] = 'EXITED'
+
+    def pull(self, image):
+        self._call('pull')
+
+    def image_digest(self, image):
+        self._call('image_digest')
+        return 'sha256:%s' % image
+
+    def registry_digest(self, image):
+        self._call('registry_digest')
+        return 'sha256:%s' % image
+
+    def logs(self, container_id, follow=False, tail=None, since=None, timestamps=False):
+        self._call('logs')
+        self._get(container_id)
+        lines = self.log_lines if tail is None else min(tail, self.log_lines)
+        for i in xrange(lines):
+            timestamp = '2014-05-01T12:00:%02d.%dZ ' % (i // 10 % 60, i % 10) if timestamps else ''
+            yield '%s%s line %d\n' % (timestamp, container_id[:12], i)
+
+    def stats(self, container_id, stream=True):
+        self._call('stats')
+        self._get(container_id)
+        yield {
+            'CPUPercent':  1.5,
+            'MemoryUsage': 64 * 1024 ** 2,
+            'MemoryLimit': 1024 ** 3,
+            'NetworkRx':   2000,
+            'NetworkTx':   1000,
+            'BlockRead':   4096,
+            'BlockWrite':  0,
+        }
+
+    def events(self, since=None):
+        self._call('events')
+        return iter([])
+
+    def execute(self, container_id, command):
+        self._call('execute')
+        return 0, ''
+
+    def exec_attach(self, container_id, command, tty=False, stdin=True):
+        self._call('exec_attach')
+        self._get(container_id)
+        return 0
+
+    def inspect_container(self, container_id):
+        self._call('inspect_container')
+        container = self._get(container_id)
+        return {
+            'Id': container['Id'],
+            'Name': container['Names'][0],
+            'Image': container['Image'],
+            'Path': container['Command'],
+            'Config': {'Image': container['Image'], 'Labels': dict(container.get('Labels') or {})},
+            'Args': [],
+            'Created': '2014-05-01T12:00:00.000000000Z',
+            'State': {'Running': container['Status'] != 'EXITED', 'StartedAt': '2014-05-01T12:00:01.000000000Z'},
+            'NetworkSettings': {'IPAddress': '172.17.0.2', 'Ports': {'80/tcp': [{'HostIp': '127.0.0.1', 'HostPort': '8080'}]}},
+            'Volumes': {'/srv/www': '/var/www'},
+            'VolumesRW': {'/srv/www': True},
+        }
+
+    def remove_container(self, container_id):
+        self._call('remove_container')
+        self._get(container_id)
+        del self._containers[container_id]
+
+    def _has_label(self, container, label):
+        key, _, value = label.partition('=')
+        labels = container.get('Labels') or {}
+        return key in labels and (not value or labels[key] == value)
+
+    def _get(self, container_id):
+        try:
+            return self._containers[container_id]
+        except KeyError:
+            raise ClientException('No such container: %s' % container_id)
@@ -0,0 +1,266 @@
+""" Benchmark harness for dockerctl commands
+
+Runs scenarios against an in-memory `FakeDockerClient` ('py') and against
+`DockerCmdlineClient` with a fake `docker` executable on PATH ('cmdline').
+Each scenario runs in a forked child process and records the wall time,
+the number of calls per client method (or docker subcommand) and the peak
+memory of the child. Results are compared against baselines.json.
+
+    python -m tests.benchmarks.harness [--full] [--latency SECONDS] [--update]
+"""
+from dockerctl.bulk import BulkOperation
+from dockerctl.cleanup import collect_garbage
+from dockerctl.container import Container
+from dockerctl.container_config import ContainerConfig
+from dockerctl.docker_cmdline_client import DockerCmdlineClient
+from dockerctl.snapshot import ContainerSnapshot
+from dockerctl.status import status_reports
+from tests.benchmarks.fake_client import FakeDockerClient
+from collections import defaultdict
+import argparse
+import json
+import logging
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINES_FILE = os.path.join(BENCHMARK_DIR, 'baselines.json')
+FAKE_DOCKER_DIR = os.path.join(BENCHMARK_DIR, 'bin')
+
+SCENARIOS = ('start', 'status', 'restart', 'logs', 'gc')
+BACKENDS = ('py', 'cmdline')
+# (containers, configs)
+SIZES = [(10, 10)]
+FULL_SIZES = [(10, 10), (1000, 100), (5000, 500)]
+CHAIN_DEPTH = 8
+
+# a result may exceed its baseline's wall time and memory by these margins
+WALL_FACTOR, WALL_SLACK = 3.0, 0.5
+RSS_FACTOR, RSS_SLACK_KB = 1.5, 20 * 1024
+
+
+class Inventory(object):
+    """ Configs and containers of one benchmark size
+
+    The first CHAIN_DEPTH configs form a chain via `depends_on` and `links`
+    and are not running. Every other config from there on has a running
+    container, and the inventory is filled up with exited containers of the
+    configs and with containers not managed by dockerctl. Containers of
+    configs carry the labels dockerctl puts on the containers it starts.
+    """
+
+    def __init__(self, container_count, config_count):
+        self.container_count = container_count
+        self.config_count = config_count
+        self.config_names = ['svc%03d' % i for i in range(config_count)]
+        self.chain = self.config_names[:min(CHAIN_DEPTH, config_count - 2)]
+        self.running = self.config_names[len(self.chain)::2]
+
+    def write_configs(self, config_dir):
+        for i, name in enumerate(self.config_names):
+            lines = ['image: image%03d' % (i % 10), 'command: /bin/true']
+            if name in self.chain[:-1]:
+                dependency = self.chain[self.chain.index(name) + 1]
+                lines += ['depends_on: [%s]' % dependency, 'links:', '  %s: %s' % (dependency, dependency)]
+            with open(os.path.join(config_dir, '%s.conf' % name), 'w') as fd:
+                fd.write('\n'.join(lines) + '\n')
+
+    def containers(self):
+        containers = []
+        for i, name in enumerate(self.running):
+            containers.append(self._container(len(containers), name, '%s-running_%d' % (name, i), 'RUNNING'))
+        while len(containers) < self.container_count:
+            i = len(containers)
+            if i % 2:
+                config_name = self.config_names[i % self.config_count]
+                containers.append(self._container(i, config_name, '%s-exited_%d' % (config_name, i), 'EXITED'))
+            else:
+                containers.append(self._container(i, None, 'unmanaged%05d-other_%d' % (i, i), 'EXITED'))
+        return containers
+
+    def _container(self, i, config_name, name, status):
+        return {
+            'Command': '/bin/true',
+            'Id':      'inv%061d' % i,
+            'Image':   'image%03d' % (i % 10),
+            'Names':   ['/%s' % name],
+            'Labels':  {'dockerctl.config': config_name} if config_name else {},
+            'Created': 1400000000 + i,
+            'Status':  status,
+        }
+
+
+class NullWriter(object):
+
+    def write(self, data):
+        pass
+
+    def flush(self):
+        pass
+
+
+def run_scenario(scenario, client, inventory):
+    snapshot = ContainerSnapshot(client)
+    if scenario == 'start':
+        Container(ContainerConfig(inventory.chain[0]), client, snapshot).start()
+    elif scenario == 'status':
+        snapshot.prefetch()
+        containers = [Container(config, client, snapshot) for config in ContainerConfig.available()]
+        for report in status_reports(containers):
+            pass
+    elif scenario == 'restart':
+        failures = BulkOperation(client, snapshot).restart([inventory.running[0]])
+        if failures:
+            raise failures.values()[0]
+    elif scenario == 'logs':
+        Container(ContainerConfig(inventory.running[0]), client, snapshot).logs(out=NullWriter())
+    elif scenario == 'gc':
+        collect_garbage(client, snapshot)
+
+
+def _make_client(backend, inventory, latency, work_dir):
+    if backend == 'py':
+        return FakeDockerClient(inventory.containers(), latency=latency), None
+
+    state = {'containers': [], 'next_id': 0}
+    for container in inventory.containers():
+        state['containers'].append({
+            'ID': container['Id'],
+            'Image': container['Image'],
+            'Command': '"%s"' % container['Command'],
+            'Names': container['Names'][0][1:],
+            'Labels': ','.join('%s=%s' % label for label in container['Labels'].iteritems()),
+            'CreatedAt': time.strftime('%Y-%m-%d %H:%M:%S +0000 UTC', time.gmtime(container['Created'])),
+            'Status': 'Up 2 hours' if container['Status'] == 'RUNNING' else 'Exited (0) 2 hours ago',
+        })
+    with open(os.path.join(work_dir, 'state.json'), 'w') as fd:
+        json.dump(state, fd)
+
+    calls_file = os.path.join(work_dir, 'calls')
+    open(calls_file, 'w').close()
+    os.environ.update({
+        'PATH': '%s:%s' % (FAKE_DOCKER_DIR, os.environ.get('PATH', '')),
+        'FAKE_DOCKER_STATE': os.path.join(work_dir, 'state.json'),
+        'FAKE_DOCKER_CALLS': calls_file,
+        'FAKE_DOCKER_LATENCY': str(latency),
+    })
+    return DockerCmdlineClient(), calls_file
+
+
+def _count_calls(client, calls_file):
+    if calls_file is None:
+        return dict(client.calls)
+
+    calls = defaultdict(int)
+    with open(calls_file) as fd:
+        for line in fd:
+            calls['docker %s' % line.strip()] += 1
+    return dict(calls)
+
+
+def measure(scenario, backend, container_count, config_count, latency=0.0):
+    """ Run one scenario in a child process and return its measurements """
+    inventory = Inventory(container_count, config_count)
+    work_dir = tempfile.mkdtemp(prefix='dockerctl-bench-')
+    try:
+        config_dir = os.path.join(work_dir, 'configs')
+        os.mkdir(config_dir)
+        inventory.write_configs(config_dir)
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            status = 0
+            try:
+                ContainerConfig.DOCKER_CONTAINER_DIR = config_dir
+                ContainerConfig.CACHE_FILE = os.path.join(work_dir, 'configs.cache')
+                logging.getLogger().setLevel(logging.WARNING)
+                client, calls_file = _make_client(backend, inventory, latency, work_dir)
+                start = time.time()
+                run_scenario(scenario, client, inventory)
+                wall = time.time() - start
+                result = {'wall': wall, 'calls': _count_calls(client, calls_file)}
+            except Exception as ex:
+                result = {'error': '%s: %s' % (type(ex).__name__, ex)}
+                status = 1
+            with os.fdopen(write_fd, 'w') as fd:
+                json.dump(result, fd)
+            os._exit(status)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd) as fd:
+            result = json.load(fd)
+        _, _, rusage = os.wait4(pid, 0)
+        if 'error' in result:
+            raise RuntimeError('Scenario %s failed: %s' % (key(scenario, backend, container_count, config_count), result['error']))
+        result['max_rss_kb'] = rusage.ru_maxrss
+
+        return result
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def key(scenario, backend, container_count, config_count):
+    return '%s-%s-%dx%d' % (backend, scenario, container_count, config_count)
+
+
+def load_baselines(filename=BASELINES_FILE):
+    with open(filename) as fd:
+        return json.load(fd)
+
+
+def regressions(result, baseline):
+    """ Return a list of descriptions of where `result` exceeds `baseline` """
+    problems = []
+    for method, count in sorted(result['calls'].iteritems()):
+        allowed = baseline['calls'].get(method, 0)
+        if count > allowed:
+            problems.append('%s called %d times, baseline %d' % (method, count, allowed))
+    max_wall = baseline['wall'] * WALL_FACTOR + WALL_SLACK
+    if result['wall'] > max_wall:
+        problems.append('took %.3fs, limit %.3fs' % (result['wall'], max_wall))
+    max_rss = baseline['max_rss_kb'] * RSS_FACTOR + RSS_SLACK_KB
+    if result['max_rss_kb'] > max_rss:
+        problems.append('used %d KB, limit %d KB' % (result['max_rss_kb'], max_rss))
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dockerctl against fake docker backends.')
+    parser.add_argument('--full', action='store_true', help='run all sizes up to 5000 containers and 500 configs')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated latency per docker call in seconds')
+    parser.add_argument('--update', action='store_true', help='store the results as new baselines')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines() if os.path.exists(BASELINES_FILE) else {}
+    failed = False
+    for container_count, config_count in (FULL_SIZES if args.full else SIZES):
+        for backend in BACKENDS:
+            for scenario in SCENARIOS:
+                name = key(scenario, backend, container_count, config_count)
+                result = measure(scenario, backend, container_count, config_count, args.latency)
+                problems = regressions(result, baselines[name]) if name in baselines and not args.update else []
+                failed = failed or bool(problems)
+                print '%-28s %8.3fs %8d KB  %s' % (
+                    name, result['wall'], result['max_rss_kb'],
+                    ', '.join('%s=%d' % item for item in sorted(result['calls'].iteritems())))
+                for problem in problems:
+                    print '    REGRESSION: %s' % problem
+                if args.update:
+                    baselines[name] = result
+
+    if args.update:
+        with open(BASELINES_FILE, 'w') as fd:
+            json.dump(baselines, fd, indent=2, sort_keys=True)
+            fd.write('\n')
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+from tests.benchmarks import harness
+import unittest
+
+
+class TestBenchmarks(unittest.TestCase):
+    """ Fails if a scenario makes more docker calls, or takes noticeably
+    more time or memory, than recorded in baselines.json """
+
+    def setUp(self):
+        self.baselines = harness.load_baselines()
+
+    def assert_no_regressions(self, backend):
+        problems = []
+        for container_count, config_count in harness.SIZES:
+            for scenario in harness.SCENARIOS:
+                name = harness.key(scenario, backend, container_count, config_count)
+                result = harness.measure(scenario, backend, container_count, config_count)
+                problems.extend('%s: %s' % (name, problem)
+                                for problem in harness.regressions(result, self.baselines[name]))
+
+        self.assertEqual(problems, [])
+
+    def test_docker_py_client_scenarios(self):
+        self.assert_no_regressions('py')
+
+    def test_docker_cmdline_client_scenarios(self):
+        self.assert_no_regressions('cmdline')
@@ -0,0 +1,41 @@
+from dockerctl.container_config import ContainerConfig
+from dockerctl.snapshot import CONFIG_LABEL
+import os.path
+import shutil
+import tempfile
+import unittest
+
+
+def container(i, config_name, status='RUNNING', labelled=True, image='image'):
+    """ A row of a container listing like `FakeDockerClient` returns it,
+    with the id 'c<i>' and the name '<config_name>-<i>' """
+    return {
+        'Command': '/bin/true',
+        'Created': 1400000000 + i,
+        'Id':      'c%d' % i,
+        'Image':   image,
+        'Labels':  {CONFIG_LABEL: config_name} if labelled else {},
+        'Names':   ['/%s-%d' % (config_name, i)],
+        'Status':  status,
+    }
+
+
+class ConfigDirTestCase(unittest.TestCase):
+    """ Points `ContainerConfig` at a temporary config directory """
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.saved = ContainerConfig.DOCKER_CONTAINER_DIR, ContainerConfig.CACHE_FILE
+        ContainerConfig.DOCKER_CONTAINER_DIR = self.config_dir
+        ContainerConfig.CACHE_FILE = os.path.join(self.config_dir, 'configs.cache')
+
+    def tearDown(self):
+        ContainerConfig.DOCKER_CONTAINER_DIR, ContainerConfig.CACHE_FILE = self.saved
+        shutil.rmtree(self.config_dir)
+
+    def write_config(self, name, content):
+        path = os.path.join(self.config_dir, '%s.conf' % name)
+        with open(path, 'w') as fd:
+            fd.write(content + '\n')
+        # make sure the config cache notices the change
+        os.utime(path, (0, os.path.getmtime(path) + 10))
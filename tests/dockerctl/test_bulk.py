@@ -0,0 +1,108 @@
+from dockerctl.bulk import BulkOperation
+from dockerctl.container import Container
+from dockerctl.container_config import ContainerConfig
+from dockerctl.snapshot import ContainerSnapshot
+from tests.benchmarks.fake_client import FakeDockerClient
+from tests.dockerctl.helpers import ConfigDirTestCase
+
+
+class TestApply(ConfigDirTestCase):
+
+    def setUp(self):
+        ConfigDirTestCase.setUp(self)
+        self.write_config('db', 'image: db')
+        self.write_config('web', 'image: web\ndepends_on: [db]')
+        self.write_config('cron', 'image: cron')
+
+        self.client = FakeDockerClient()
+        self.apply()
+
+    def apply(self):
+        self.client.calls.clear()
+        failures = BulkOperation(self.client, ContainerSnapshot(self.client)).apply(['cron', 'db', 'web'])
+        self.assertEqual({}, failures)
+
+    def running_images(self):
+        return sorted(c['Image'] for c in self.client.containers())
+
+    def test_starts_missing_containers(self):
+        self.assertEqual(['cron', 'db', 'web'], self.running_images())
+
+    def test_does_nothing_without_changes(self):
+        self.apply()
+
+        self.assertEqual({'containers': 1}, dict(self.client.calls))
+
+    def test_restarts_changed_containers_and_their_dependents(self):
+        self.write_config('db', 'image: db\nenvironment: {A: "1"}')
+
+        self.apply()
+
+        self.assertEqual(2, self.client.calls['stop'])
+        self.assertEqual(2, self.client.calls['run'])
+        self.assertEqual(['cron', 'db', 'web'], self.running_images())
+
+    def test_ignores_settings_that_dont_make_up_the_container(self):
+        self.write_config('cron', 'image: cron\nautopull: false')
+
+        self.apply()
+
+        self.assertEqual(0, self.client.calls['run'])
+
+
+class TestStartStop(ConfigDirTestCase):
+
+    def setUp(self):
+        ConfigDirTestCase.setUp(self)
+        self.write_config('db', 'image: db')
+        self.write_config('web', 'image: web\ndepends_on: [db]')
+        self.write_config('app', 'image: app\ndepends_on: [web]')
+
+        self.client = FakeDockerClient()
+        self.bulk = BulkOperation(self.client, ContainerSnapshot(self.client))
+
+    def running_images(self):
+        return sorted(c['Image'] for c in self.client.containers())
+
+    def test_start_counts_running_containers_as_started(self):
+        self.assertEqual({}, self.bulk.start(['db']))
+
+        self.assertEqual({}, self.bulk.start(['app', 'db', 'web']))
+        self.assertEqual(['app', 'db', 'web'], self.running_images())
+        self.assertEqual(3, self.client.calls['run'])
+
+    def test_stop_with_dependents_only_stops_running_dependents(self):
+        self.bulk.start(['web'])
+
+        self.assertEqual({}, self.bulk.stop(['db'], with_dependents=True))
+        self.assertEqual([], self.running_images())
+
+    def test_stop_counts_exited_containers_as_stopped(self):
+        self.bulk.start(['app'])
+        self.client.stop(self.client.containers(filters={'name': 'web'})[0]['Id'])
+
+        self.assertEqual({}, self.bulk.stop(['db', 'web']))
+        self.assertEqual(['app'], self.running_images())
+
+    def test_restart_starts_exited_containers_again(self):
+        self.bulk.start(['web'])
+        self.client.stop(self.client.containers(filters={'name': 'web'})[0]['Id'])
+
+        self.assertEqual({}, self.bulk.restart(['db', 'web']))
+        self.assertEqual(['db', 'web'], self.running_images())
+
+    def test_stopping_many_containers_uses_one_listing(self):
+        for i in range(20):
+            self.write_config('worker%d' % i, 'image: worker')
+        names = ['worker%d' % i for i in range(20)]
+        self.bulk.start(names)
+        self.client.calls.clear()
+
+        self.assertEqual({}, BulkOperation(self.client, ContainerSnapshot(self.client)).stop(names))
+        self.assertEqual(1, self.client.calls['containers'])
+
+    def test_starting_a_chain_of_dependencies_uses_one_listing(self):
+        Container(ContainerConfig('app'), self.client, ContainerSnapshot(self.client)).start()
+
+        self.assertEqual(1, self.client.calls['containers'])
+        self.assertEqual(['app', 'db', 'web'], self.running_images())
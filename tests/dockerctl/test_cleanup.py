@@ -0,0 +1,43 @@
+from dockerctl.cleanup import collect_garbage
+from dockerctl.snapshot import ContainerSnapshot
+from tests.benchmarks.fake_client import FakeDockerClient
+from tests.dockerctl.helpers import ConfigDirTestCase, container
+
+
+class TestCollectGarbage(ConfigDirTestCase):
+
+    def setUp(self):
+        ConfigDirTestCase.setUp(self)
+        self.write_config('web', 'image: image')
+
+        self.client = FakeDockerClient([
+            container(1, 'web', 'EXITED'),
+            container(2, 'web', 'EXITED'),
+            container(3, 'web', 'EXITED'),
+            container(4, 'web', 'RUNNING'),
+            container(5, 'other', 'EXITED', labelled=False),
+        ])
+        self.snapshot = ContainerSnapshot(self.client)
+
+    def test_keeps_the_most_recent_exited_containers_of_each_config(self):
+        removed = collect_garbage(self.client, self.snapshot, keep=1)
+
+        self.assertEqual(['c1', 'c2'], sorted(removed))
+        self.assertEqual(1, self.client.calls['containers'])
+        self.assertEqual(['c3', 'c4', 'c5'], sorted(c['Id'] for c in self.client.containers(all=True)))
+
+    def test_never_removes_containers_without_labels(self):
+        self.client = FakeDockerClient([
+            container(1, 'web', 'EXITED', labelled=False),
+            container(2, 'web', 'EXITED', labelled=False),
+            container(3, 'web', 'EXITED'),
+        ])
+
+        removed = collect_garbage(self.client, ContainerSnapshot(self.client), keep=0)
+
+        self.assertEqual(['c3'], removed)
+
+    def test_keep_zero_removes_all_exited_containers(self):
+        removed = collect_garbage(self.client, self.snapshot, keep=0)
+
+        self.assertEqual(['c1', 'c2', 'c3'], sorted(removed))
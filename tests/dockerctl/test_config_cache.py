@@ -0,0 +1,79 @@
+from dockerctl import config_cache
+from dockerctl.config_cache import ConfigCache
+from mock import patch
+import json
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+
+class TestConfigCache(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.config_dir, 'cache', 'configs.cache')
+        self.write_config('web', 'image: web\nports: [{container_port: 80, host_port: 8080}]\n', mtime=1000)
+        self.load_yaml = patch('dockerctl.config_cache.load_yaml', side_effect=config_cache.load_yaml).start()
+
+    def tearDown(self):
+        patch.stopall()
+        shutil.rmtree(self.config_dir)
+
+    def write_config(self, name, content, mtime):
+        path = os.path.join(self.config_dir, '%s.conf' % name)
+        with open(path, 'w') as fd:
+            fd.write(content)
+        os.utime(path, (mtime, mtime))
+
+    def get(self, name='web'):
+        cache = ConfigCache(self.config_dir, self.cache_file)
+        data = cache.get(name)
+        cache.save()
+        return data
+
+    def test_parses_each_file_only_once(self):
+        self.get()
+        data = self.get()
+
+        self.assertEqual(1, self.load_yaml.call_count)
+        self.assertEqual({'image': 'web', 'ports': [{'container_port': 80, 'host_port': 8080}]}, data)
+        self.assertIsInstance(data['image'], str)
+
+    def test_stores_the_cache_as_json(self):
+        self.get()
+
+        with open(self.cache_file) as fd:
+            self.assertEqual(2, json.load(fd)['version'])
+
+    def test_parses_files_again_when_their_mtime_or_size_changes(self):
+        self.get()
+        self.write_config('web', 'image: web\nports: [{container_port: 80, host_port: 8080}]\n', mtime=2000)
+        self.get()
+        self.write_config('web', 'image: web2\n', mtime=2000)
+
+        self.assertEqual({'image': 'web2'}, self.get())
+        self.assertEqual(3, self.load_yaml.call_count)
+
+    def test_ignores_an_unreadable_cache(self):
+        os.makedirs(os.path.dirname(self.cache_file))
+        with open(self.cache_file, 'w') as fd:
+            fd.write('\x80\x02garbage')
+
+        self.assertEqual('web', self.get()['image'])
+        self.assertEqual('web', self.get()['image'])
+        self.assertEqual(1, self.load_yaml.call_count)
+
+    def test_ignores_an_unwritable_cache(self):
+        self.cache_file = os.path.join(self.config_dir, 'web.conf', 'configs.cache')
+
+        self.assertEqual('web', self.get()['image'])
+        self.assertEqual('web', self.get()['image'])
+
+    def test_does_not_cache_configs_json_cannot_represent(self):
+        self.write_config('odd', 'environment: {1: one}\n', mtime=1000)
+
+        self.get('odd')
+        self.assertEqual({'environment': {1: 'one'}}, self.get('odd'))
+        self.assertEqual(2, self.load_yaml.call_count)
@@ -0,0 +1,45 @@
+from dockerctl.container_index import LiveContainerIndex
+import unittest
+from mock import MagicMock
+
+
+class TestLiveContainerIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.containers.return_value = [
+            {'Id': 'a', 'Names': ['/web-happy_tesla'], 'Status': 'RUNNING'},
+        ]
+        self.index = LiveContainerIndex(self.client)
+        self.index.prefetch()
+        self.changes = []
+        self.index.subscribe(self.changes.append)
+
+    def test_update_adds_new_containers(self):
+        self.client.containers.return_value = [
+            {'Id': 'b', 'Names': ['/db-sad_bohr'], 'Status': 'RUNNING'},
+        ]
+
+        self.index._update('b')
+
+        self.assertEqual([c['Id'] for c in self.index.containers('db')], ['b'])
+        self.assertEqual(self.changes, [set(['db'])])
+        self.client.containers.assert_called_with(all=True, filters={'id': 'b'})
+
+    def test_update_replaces_changed_containers(self):
+        self.client.containers.return_value = [
+            {'Id': 'a', 'Names': ['/web-happy_tesla'], 'Status': 'EXITED'},
+        ]
+
+        self.index._update('a')
+
+        self.assertEqual(self.index.containers('web'), [])
+        self.assertEqual([c['Id'] for c in self.index.containers('web', only_running=False)], ['a'])
+
+    def test_update_removes_destroyed_containers(self):
+        self.client.containers.return_value = []
+
+        self.index._update('a')
+
+        self.assertEqual(self.index.containers('web', only_running=False), [])
+        self.assertEqual(self.changes, [set(['web'])])
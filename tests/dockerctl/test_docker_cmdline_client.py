@@ -0,0 +1,91 @@
+from dockerctl.docker_cmdline_client import DockerCmdlineClient
+from dockerctl.exceptions import ClientException
+import signal
+import subprocess
+import unittest
+from mock import MagicMock, patch
+
+
+class TestDockerCmdlineClient(unittest.TestCase):
+
+    def setUp(self):
+        self.client = DockerCmdlineClient()
+        self.client._run_cmd = MagicMock()
+
+    def test_containers_parses_json_lines(self):
+        self.client._run_cmd.return_value = '\n'.join([
+            '{"Command":"\\"/bin/sh -c   \'sleep 1\'\\"","ID":"abc","Image":"busybox","CreatedAt":"2014-05-01 14:00:00 +0200 CEST","Labels":"dockerctl.config=web,dockerctl.version=1.0","Names":"web-happy_tesla","Status":"Up 2 hours"}',
+            '{"Command":"\\"true\\"","ID":"def","Image":"busybox","CreatedAt":"2014-05-01 12:00:00 +0000 UTC","Labels":"","Names":"db-sad_bohr,web-happy_tesla/db","Status":"Exited (0) 1 hour ago"}',
+        ])
+
+        result = self.client.containers(all=True)
+
+        self.assertEqual(result, [
+            {'Command': "/bin/sh -c   'sleep 1'", 'Id': 'abc', 'Image': 'busybox',
+             'Names': ['/web-happy_tesla'], 'Labels': {'dockerctl.config': 'web', 'dockerctl.version': '1.0'},
+             'Created': 1398945600,
+             'Status': 'RUNNING'},
+            {'Command': 'true', 'Id': 'def', 'Image': 'busybox',
+             'Names': ['/db-sad_bohr', '/web-happy_tesla/db'], 'Labels': {}, 'Created': 1398945600, 'Status': 'EXITED'},
+        ])
+
+    def test_containers_pushes_filters_to_the_daemon(self):
+        self.client._run_cmd.return_value = ''
+
+        self.client.containers(filters={'name': '^/?web-', 'status': ['running', 'paused']})
+
+        self.client._run_cmd.assert_called_once_with([
+            'docker', 'ps', '--no-trunc=true', '--format={{json .}}',
+            '--filter=name=^/?web-', '--filter=status=running', '--filter=status=paused'])
+
+    def test_logs_passes_the_options_as_arguments(self):
+        self.client._stream_cmd = MagicMock()
+
+        self.client.logs('abc')
+        self.client.logs('abc', follow=True, tail=10, since=1398945600)
+
+        self.assertEqual([
+            (['docker', 'logs', 'abc'],),
+            (['docker', 'logs', '--follow', '--tail=10', '--since=1398945600', 'abc'],),
+        ], [args for args, _ in self.client._stream_cmd.call_args_list])
+
+
+class TestStreamCmd(unittest.TestCase):
+
+    def setUp(self):
+        self.client = DockerCmdlineClient()
+        self.processes = []
+        popen = subprocess.Popen
+
+        def record(*args, **kwargs):
+            self.processes.append(popen(*args, **kwargs))
+            return self.processes[-1]
+
+        self.patcher = patch('subprocess.Popen', side_effect=record)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_yields_the_output(self):
+        output = ''.join(self.client._stream_cmd(['sh', '-c', 'echo one; echo two']))
+
+        self.assertEqual('one\ntwo\n', output)
+        self.assertEqual(0, self.processes[0].returncode)
+
+    def test_raises_after_the_output_if_the_command_fails(self):
+        chunks = []
+
+        with self.assertRaises(ClientException):
+            for chunk in self.client._stream_cmd(['sh', '-c', 'echo failed; exit 3']):
+                chunks.append(chunk)
+        self.assertEqual('failed\n', ''.join(chunks))
+
+    def test_closing_the_stream_terminates_the_command(self):
+        stream = self.client._stream_cmd(['sh', '-c', 'echo started; exec sleep 10'])
+
+        self.assertEqual('started\n', next(stream))
+        stream.close()
+
+        self.assertEqual(-signal.SIGTERM, self.processes[0].returncode)
+        self.assertTrue(self.processes[0].stdout.closed)
@@ -0,0 +1,22 @@
+from dockerctl.docker_py_client import DockerPyClient
+import unittest
+from mock import patch
+
+
+class TestDockerPyClient(unittest.TestCase):
+
+    def setUp(self):
+        with patch('docker.Client'):
+            self.client = DockerPyClient()
+
+    def test_logs_streams_all_lines_by_default(self):
+        self.client.logs('abc')
+
+        self.client._client.logs.assert_called_once_with(
+            'abc', stream=True, timestamps=False, follow=False, tail='all', since=None)
+
+    def test_logs_passes_the_options(self):
+        self.client.logs('abc', follow=True, tail=10, since=1398945600)
+
+        self.client._client.logs.assert_called_once_with(
+            'abc', stream=True, timestamps=False, follow=True, tail=10, since=1398945600)
@@ -0,0 +1,144 @@
+from dockerctl.docker_socket_client import DockerSocketClient
+from dockerctl.exceptions import ClientException
+import BaseHTTPServer
+import SocketServer
+import json
+import os.path
+import shutil
+import struct
+import tempfile
+import threading
+import unittest
+
+
+class FakeDaemonHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Answers requests from `server.routes`, a dict mapping
+    'METHOD /path' to a (status, body) tuple or a list of chunks """
+
+    protocol_version = 'HTTP/1.1'
+
+    def address_string(self):
+        return 'unix'
+
+    def log_message(self, *args):
+        pass
+
+    def handle_one_request(self):
+        self.server.connections.add(id(self.connection))
+        BaseHTTPServer.BaseHTTPRequestHandler.handle_one_request(self)
+
+    def respond(self):
+        path, _, query = self.path.partition('?')
+        length = int(self.headers.getheader('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+        self.server.requests.append((self.command, path, query, body and json.loads(body)))
+        route = self.server.routes.get('%s %s' % (self.command, path), (404, {'message': 'no such route'}))
+
+        self.send_response(200 if isinstance(route, list) else route[0])
+        if isinstance(route, list):
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in route:
+                self.wfile.write('%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write('0\r\n\r\n')
+        else:
+            data = json.dumps(route[1]) if route[1] is not None else ''
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    do_GET = do_POST = do_DELETE = respond
+
+
+class FakeDaemon(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        SocketServer.UnixStreamServer.__init__(self, socket_path, FakeDaemonHandler)
+        self.routes = {}
+        self.requests = []
+        self.connections = set()
+
+
+def frame(stream, data):
+    return struct.pack('>BxxxI', stream, len(data)) + data
+
+
+class TestDockerSocketClient(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.daemon = FakeDaemon(os.path.join(self.tmp_dir, 'docker.sock'))
+        thread = threading.Thread(target=self.daemon.serve_forever, args=(0.05,))
+        thread.daemon = True
+        thread.start()
+        self.client = DockerSocketClient(os.path.join(self.tmp_dir, 'docker.sock'))
+
+    def tearDown(self):
+        self.client.pool.close()
+        self.daemon.shutdown()
+        self.daemon.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_containers_sends_filters_and_reuses_connection(self):
+        self.daemon.routes['GET /v1.24/containers/json'] = (200, [
+            {'Command': '/bin/true', 'Created': 1400000000, 'Id': 'abc', 'Image': 'img', 'Names': ['/web-a'],
+             'Status': 'Exited (0) 1 hour ago'},
+        ])
+
+        for _ in range(3):
+            containers = self.client.containers(all=True, filters={'name': '^/?web-'})
+
+        self.assertEqual('EXITED', containers[0]['Status'])
+        _, _, query, _ = self.daemon.requests[0]
+        self.assertIn('all=1', query)
+        self.assertIn('%22name%22%3A+%5B%22%5E%2F%3Fweb-%22%5D', query)
+        self.assertEqual(1, len(self.daemon.connections))
+
+    def test_run_creates_and_starts_container(self):
+        self.daemon.routes['POST /v1.24/containers/create'] = (201, {'Id': 'abc'})
+        self.daemon.routes['POST /v1.24/containers/abc/start'] = (204, None)
+
+        container_id = self.client.run(
+            'img', command='run me', environment={'A': '1'}, name='web-a',
+            binds={'/srv': {'bind': '/data', 'ro': True}},
+            port_bindings={80: ('127.0.0.1', 8080)},
+            links={'db-b': 'db'})
+
+        self.assertEqual('abc', container_id)
+        method, path, query, body = self.daemon.requests[0]
+        self.assertEqual('name=web-a', query)
+        self.assertEqual(['run', 'me'], body['Cmd'])
+        self.assertEqual(['A=1'], body['Env'])
+        self.assertEqual(['/srv:/data:ro'], body['HostConfig']['Binds'])
+        self.assertEqual({'80/tcp': [{'HostIp': '127.0.0.1', 'HostPort': '8080'}]}, body['HostConfig']['PortBindings'])
+        self.assertEqual(['db-b:db'], body['HostConfig']['Links'])
+
+    def test_api_error_raises_client_exception(self):
+        with self.assertRaises(ClientException) as cm:
+            self.client.inspect_container('missing')
+
+        self.assertIn('no such route', str(cm.exception))
+        self.assertIsNone(self.client.image_digest('missing'))
+
+    def test_logs_are_demultiplexed_across_chunks(self):
+        data = frame(1, 'first line\n') + frame(2, 'error\n')
+        self.daemon.routes['GET /v1.24/containers/abc/logs'] = [data[:5], data[5:14], data[14:]]
+
+        self.assertEqual('first line\nerror\n', ''.join(self.client.logs('abc', tail=10)))
+        _, _, query, _ = self.daemon.requests[0]
+        self.assertIn('tail=10', query)
+
+    def test_logs_of_tty_containers_are_passed_through(self):
+        self.daemon.routes['GET /v1.24/containers/abc/logs'] = ['hi\n', 'there\n']
+
+        self.assertEqual('hi\nthere\n', ''.join(self.client.logs('abc')))
+
+    def test_events(self):
+        self.daemon.routes['GET /v1.24/events'] = [
+            '{"Type": "container", "Action": "start", "id": "abc"}\n{"Type": "network"',
+            ', "Action": "connect", "id": "net"}\n',
+        ]
+
+        self.assertEqual([{'Id': 'abc', 'Action': 'start'}], list(self.client.events()))
@@ -0,0 +1,58 @@
+from dockerctl.container import Container, PORT_CONFLICT_FAIL
+from dockerctl.container_config import ContainerConfig
+from dockerctl.exceptions import ContainerException
+from dockerctl.snapshot import ContainerSnapshot
+from tests.benchmarks.fake_client import FakeDockerClient
+from tests.dockerctl.helpers import ConfigDirTestCase
+
+
+class TestHandover(ConfigDirTestCase):
+
+    def setUp(self):
+        ConfigDirTestCase.setUp(self)
+        self.client = FakeDockerClient(log_lines=1)
+
+    def start(self, config):
+        self.write_config('web', config)
+        self.old_id = self.container().start()
+        self.client.calls.clear()
+
+    def container(self):
+        return Container(ContainerConfig('web'), self.client, ContainerSnapshot(self.client))
+
+    def ids(self, all=False):
+        return [c['Id'] for c in self.client.containers(all=all)]
+
+    def test_starts_the_new_instance_before_removing_the_old_one(self):
+        self.start('image: web')
+
+        new_id = self.container().handover()
+
+        self.assertNotEqual(self.old_id, new_id)
+        self.assertEqual([new_id], self.ids(all=True))
+
+    def test_removes_the_new_instance_if_it_does_not_get_ready(self):
+        self.start('image: web\nready: {log: never, timeout: 0.1, interval: 0.01}')
+
+        with self.assertRaises(ContainerException):
+            self.container().handover()
+
+        self.assertEqual(1, self.client.calls['run'])
+        self.assertEqual([self.old_id], self.ids(all=True))
+
+    def test_stops_containers_publishing_ports_first(self):
+        self.start('image: web\nports: [{container_port: 80, host_port: 8080}]')
+
+        new_id = self.container().handover()
+
+        self.assertEqual([new_id], self.ids())
+        self.assertIn(self.old_id, self.ids(all=True))
+
+    def test_port_conflict_fail(self):
+        self.start('image: web\nports: [{container_port: 80, host_port: 8080}]')
+
+        with self.assertRaises(ContainerException):
+            self.container().handover(port_conflict=PORT_CONFLICT_FAIL)
+
+        self.assertEqual(0, self.client.calls['run'])
+        self.assertEqual([self.old_id], self.ids())
@@ -0,0 +1,100 @@
+from dockerctl import logs
+from dockerctl.container import Container
+from dockerctl.exceptions import ContainerException
+from dockerctl.snapshot import ContainerSnapshot
+from StringIO import StringIO
+from tests.benchmarks.fake_client import FakeDockerClient
+from tests.dockerctl.helpers import container
+import unittest
+from mock import MagicMock
+
+
+class StubClient(object):
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def logs(self, container_id, timestamps=False, **options):
+        # split into chunks that do not end at line boundaries
+        data = ''.join(self.lines[container_id])
+        return [data[i:i + 7] for i in xrange(0, len(data), 7)]
+
+
+class StubContainer(object):
+
+    def __init__(self, name, container_id, client):
+        self.config = type('Config', (object,), {'name': name})
+        self.container_id = container_id
+        self.client = client
+
+    def get_runtime_id(self):
+        return self.container_id
+
+
+class TestLogs(unittest.TestCase):
+
+    def test_split_timestamp_pads_the_fraction(self):
+        key, rest = logs.split_timestamp('2014-05-01T12:00:00.1Z hello\n')
+        self.assertEqual('2014-05-01T12:00:00.100000000', key)
+        self.assertEqual('hello\n', rest)
+        self.assertTrue(key > logs.split_timestamp('2014-05-01T12:00:00.09Z x')[0])
+        self.assertEqual((None, 'hello'), logs.split_timestamp('hello'))
+
+    def test_merges_lines_by_timestamp_with_prefixes(self):
+        client = StubClient({
+            'c1': ['2014-05-01T12:00:01Z db one\n', '2014-05-01T12:00:03.5Z db two\n'],
+            'c2': ['2014-05-01T12:00:02Z web one\n', '2014-05-01T12:00:03.25Z web two\n'],
+            'c3': [],
+        })
+        containers = [
+            StubContainer('database', 'c1', client),
+            StubContainer('web', 'c2', client),
+            StubContainer('idle', 'c3', client),
+            StubContainer('stopped', None, client),
+        ]
+        out = StringIO()
+
+        logs.merged_logs(containers, out=out)
+
+        self.assertEqual([
+            'database | db one',
+            'web      | web one',
+            'web      | web two',
+            'database | db two',
+        ], out.getvalue().splitlines())
+
+    def test_follow_releases_all_lines_when_the_streams_end(self):
+        client = StubClient({
+            'c1': ['2014-05-01T12:00:02Z b\n'],
+            'c2': ['2014-05-01T12:00:01Z a\n'],
+        })
+        out = StringIO()
+
+        logs.merged_logs([StubContainer('x', 'c1', client), StubContainer('y', 'c2', client)], follow=True, out=out)
+
+        self.assertEqual(['y | a', 'x | b'], out.getvalue().splitlines())
+
+
+class TestContainerLogs(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeDockerClient([container(1, 'web'), container(2, 'db', 'EXITED')])
+        self.client.logs = MagicMock(return_value=iter(['one\ntw', 'o\n']))
+
+    def logs(self, config_name, **options):
+        config = type('Config', (object,), {'name': config_name})
+        out = StringIO()
+        Container(config, self.client, ContainerSnapshot(self.client)).logs(out=out, **options)
+        return out.getvalue()
+
+    def test_writes_the_chunks_of_the_running_container(self):
+        self.assertEqual('one\ntwo\n', self.logs('web'))
+        self.client.logs.assert_called_once_with('c1', follow=False, tail=None, since=None)
+
+    def test_passes_follow_tail_and_since(self):
+        self.logs('web', follow=True, tail=10, since=1398945600)
+
+        self.client.logs.assert_called_once_with('c1', follow=True, tail=10, since=1398945600)
+
+    def test_fails_if_the_container_is_not_running(self):
+        self.assertRaises(ContainerException, self.logs, 'db')
@@ -0,0 +1,95 @@
+from dockerctl.profiling import Profiler, InstrumentedClient
+import json
+import os
+import os.path
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class Client(object):
+
+    def containers(self, all=False):
+        return [{'Id': 'c1'}]
+
+    def logs(self, container_id):
+        for i in range(2):
+            time.sleep(0.05)
+            yield 'line %d\n' % i
+
+
+class TestInstrumentedClient(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = Profiler()
+        self.profiler.enabled = True
+        self.client = InstrumentedClient(Client(), self.profiler)
+
+    def names(self):
+        return [name for name, _, _, _, _ in self.profiler.spans]
+
+    def test_records_a_span_per_call(self):
+        self.assertEqual([{'Id': 'c1'}], self.client.containers(all=True))
+
+        self.assertEqual(['client.containers'], self.names())
+
+    def test_streams_are_recorded_until_they_are_exhausted(self):
+        stream = self.client.logs('c1')
+        self.assertEqual(['client.logs'], self.names())
+
+        self.assertEqual('line 0\n', next(stream))
+        self.assertEqual(['client.logs'], self.names())
+
+        self.assertEqual(['line 1\n'], list(stream))
+        self.assertEqual(['client.logs', 'client.logs.stream'], self.names())
+        self.assertTrue(self.profiler.spans[1][2] >= 0.1)
+
+    def test_records_nothing_unless_enabled(self):
+        self.profiler.enabled = False
+
+        self.client.containers()
+        list(self.client.logs('c1'))
+
+        self.assertEqual([], self.profiler.spans)
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = Profiler()
+        self.profiler.spans = [
+            ('client.containers', 100.0, 0.25, 'MainThread', {}),
+            ('container.run', 100.5, 1.0, 'worker-1', {'config': 'web'}),
+            ('client.containers', 101.0, 0.5, 'MainThread', {}),
+        ]
+
+    def test_summary_aggregates_spans_by_name(self):
+        lines = self.profiler.summary().split('\n')
+
+        self.assertEqual(['SPAN', 'COUNT', 'TOTAL', 'MAX'], lines[0].split())
+        self.assertEqual(['container.run', '1', '1.000s', '1.000s'], lines[1].split())
+        self.assertEqual(['client.containers', '2', '0.750s', '0.500s'], lines[2].split())
+        self.assertEqual(3, len(lines))
+
+    def test_write_trace(self):
+        trace_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(trace_dir, 'trace.json')
+            self.profiler.write_trace(filename)
+            with open(filename) as fd:
+                events = json.load(fd)['traceEvents']
+        finally:
+            shutil.rmtree(trace_dir)
+
+        self.assertEqual(3, len(events))
+        self.assertEqual({
+            'name': 'container.run',
+            'cat':  'container',
+            'ph':   'X',
+            'ts':   100500000,
+            'dur':  1000000,
+            'pid':  os.getpid(),
+            'tid':  'worker-1',
+            'args': {'config': 'web'},
+        }, events[1])
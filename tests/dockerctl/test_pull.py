@@ -0,0 +1,60 @@
+from dockerctl.pull import PullPlanner
+from tests.benchmarks.fake_client import FakeDockerClient
+import os.path
+import shutil
+import tempfile
+import unittest
+
+
+class OutdatedFakeDockerClient(FakeDockerClient):
+    """ Reports a newer digest in the registry for the images in `outdated` """
+
+    def __init__(self, outdated=()):
+        FakeDockerClient.__init__(self)
+        self.outdated = set(outdated)
+
+    def registry_digest(self, image):
+        digest = FakeDockerClient.registry_digest(self, image)
+        return digest + '-new' if image in self.outdated else digest
+
+
+class TestPullPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.cache_dir, 'pulls.json')
+        self.client = OutdatedFakeDockerClient(['web:latest', 'db:9.4'])
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def planner(self):
+        return PullPlanner(self.client, cache_file=self.cache_file)
+
+    def test_pulls_each_image_once(self):
+        pulled = self.planner().pull([('web', 0), ('web:latest', 0), ('db:9.4', 0)])
+
+        self.assertEqual(['db:9.4', 'web:latest'], sorted(pulled))
+        self.assertEqual(2, self.client.calls['pull'])
+
+    def test_skips_images_with_the_registry_digest(self):
+        pulled = self.planner().pull([('web', 0), ('cache', 0)])
+
+        self.assertEqual(['web:latest'], pulled)
+        self.assertEqual(2, self.client.calls['registry_digest'])
+
+    def test_skips_images_checked_within_their_ttl(self):
+        self.planner().pull([('web', 0), ('db:9.4', 0)])
+        self.client.calls.clear()
+
+        pulled = self.planner().pull([('web', 3600), ('db:9.4', 0)])
+
+        self.assertEqual(['db:9.4'], pulled)
+        self.assertEqual(1, self.client.calls['registry_digest'])
+
+    def test_checks_each_image_only_once_per_planner(self):
+        planner = self.planner()
+        planner.pull([('web', 0)])
+
+        self.assertEqual([], planner.pull([('web', 0)]))
+        self.assertEqual(1, self.client.calls['pull'])
@@ -0,0 +1,89 @@
+from dockerctl.exceptions import ContainerException
+from dockerctl.readiness import wait_until_ready
+from tests.benchmarks.fake_client import FakeDockerClient
+from tests.dockerctl.helpers import container
+import socket
+import threading
+import time
+import unittest
+
+
+class Config(dict):
+
+    def __init__(self, name, ready):
+        dict.__init__(self, ready=dict(ready, interval=0.01))
+        self.name = name
+
+
+class LocalFakeDockerClient(FakeDockerClient):
+    """ Reports `ip_address` as the address of all containers, and lets
+    `execute` fail until `failing_execs` is used up """
+
+    ip_address = '127.0.0.1'
+    failing_execs = 0
+
+    def inspect_container(self, container_id):
+        data = FakeDockerClient.inspect_container(self, container_id)
+        data['NetworkSettings']['IPAddress'] = self.ip_address
+        return data
+
+    def execute(self, container_id, command):
+        FakeDockerClient.execute(self, container_id, command)
+        if self.failing_execs:
+            self.failing_execs -= 1
+            return 1, ''
+        return 0, ''
+
+
+class TestReadiness(unittest.TestCase):
+
+    def setUp(self):
+        self.client = LocalFakeDockerClient([container(1, 'db')], log_lines=5)
+
+    def test_log_probe(self):
+        wait_until_ready(self.client, Config('db', {'log': r'line \d'}), 'c1')
+
+        self.assertEqual(1, self.client.calls['logs'])
+
+    def test_log_probe_times_out_without_leaving_anything_running(self):
+        threads = threading.active_count()
+
+        with self.assertRaises(ContainerException):
+            wait_until_ready(self.client, Config('db', {'log': 'ready', 'timeout': 0.1}), 'c1')
+        self.assertEqual(threads, threading.active_count())
+        self.assertTrue(self.client.calls['logs'] > 1)
+
+    def test_tcp_probe(self):
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        try:
+            wait_until_ready(self.client, Config('db', {'tcp': server.getsockname()[1]}), 'c1')
+        finally:
+            server.close()
+
+    def test_tcp_probe_times_out(self):
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        port = server.getsockname()[1]
+        server.close()
+
+        with self.assertRaises(ContainerException):
+            wait_until_ready(self.client, Config('db', {'tcp': port, 'timeout': 0.1}), 'c1')
+
+    def test_exec_probe_retries_until_the_command_succeeds(self):
+        self.client.failing_execs = 2
+
+        wait_until_ready(self.client, Config('db', {'exec': 'pg_isready'}), 'c1')
+
+        self.assertEqual(3, self.client.calls['execute'])
+
+    def test_gives_up_as_soon_as_the_container_exited(self):
+        self.client.failing_execs = 1000
+        self.client.stop('c1')
+        started = time.time()
+
+        with self.assertRaises(ContainerException) as cm:
+            wait_until_ready(self.client, Config('db', {'exec': 'pg_isready', 'timeout': 10}), 'c1')
+        self.assertIn('exited', str(cm.exception))
+        self.assertTrue(time.time() - started < 1)
@@ -0,0 +1,60 @@
+from dockerctl.exceptions import ContainerException, DependencyCycleException
+from dockerctl.scheduler import DependencyGraph
+import threading
+import unittest
+
+
+class Config(dict):
+
+    def __init__(self, name, depends_on=()):
+        self.name = name
+        self['depends_on'] = list(depends_on)
+
+
+class TestDependencyGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = DependencyGraph([
+            Config('web', ['app']),
+            Config('app', ['db', 'cache']),
+            Config('db'),
+            Config('cache'),
+            Config('other'),
+        ])
+
+    def test_dependencies_are_transitive(self):
+        self.assertEqual(self.graph.dependencies('web'), set(['app', 'db', 'cache']))
+
+    def test_dependents_are_transitive(self):
+        self.assertEqual(self.graph.dependents('db'), set(['app', 'web']))
+
+    def test_levels_group_independent_nodes(self):
+        levels = self.graph.levels(['web', 'app', 'db', 'cache'])
+
+        self.assertEqual(levels, [['cache', 'db'], ['app'], ['web']])
+
+    def test_levels_can_be_reversed(self):
+        levels = self.graph.levels(['web', 'app', 'db'], reverse=True)
+
+        self.assertEqual(levels, [['web'], ['app'], ['db']])
+
+    def test_run_calls_every_node_once_in_dependency_order(self):
+        calls = []
+        lock = threading.Lock()
+
+        def record(name):
+            with lock:
+                calls.append(name)
+
+        self.graph.run(record, self.graph.dependencies('web'))
+
+        self.assertEqual(sorted(calls[:2]), ['cache', 'db'])
+        self.assertEqual(calls[2:], ['app'])
+
+    def test_cycles_are_detected(self):
+        with self.assertRaises(DependencyCycleException):
+            DependencyGraph([Config('a', ['b']), Config('b', ['c']), Config('c', ['a'])])
+
+    def test_unknown_dependencies_are_rejected(self):
+        with self.assertRaises(ContainerException):
+            DependencyGraph([Config('a', ['missing'])])
@@ -0,0 +1,64 @@
+from dockerctl import server
+from dockerctl.cli import build_parser
+from StringIO import StringIO
+from tests.benchmarks.fake_client import FakeDockerClient
+import logging
+import os.path
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.socket_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.socket_dir, 'dockerctl.sock')
+        self.executed = []
+        self.server = server.DockerctlServer(self.socket_path, FakeDockerClient(), build_parser, self.execute)
+        self.server.snapshot.start()
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,))
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.socket_dir)
+
+    def execute(self, args, docker_client, snapshot):
+        self.executed.append((args, snapshot.state.state_dir))
+        print 'started %s' % ' '.join(args.containers)
+        logging.getLogger('dockerctl').error('%s failed' % args.containers[-1])
+        sys.stderr.write('more\n')
+        return 5
+
+    def forward(self, argv):
+        out, err = StringIO(), StringIO()
+        exit_code = server.forward(self.socket_path, argv, out, err)
+        return exit_code, out.getvalue(), err.getvalue()
+
+    def test_relays_output_and_exit_code(self):
+        exit_code, out, err = self.forward(['start', 'web', 'db'])
+
+        self.assertEqual(5, exit_code)
+        self.assertEqual('started web db\n', out)
+        self.assertEqual('[ERROR] db failed\nmore\n', err)
+
+    def test_uses_the_forwarded_state_dir(self):
+        self.forward(['--state-dir', '/tmp/dockerctl-state', 'start', 'web'])
+        self.forward(['start', 'web'])
+
+        self.assertEqual(['/tmp/dockerctl-state', '/run/dockerctl'], [state_dir for _, state_dir in self.executed])
+
+    def test_relays_argument_errors(self):
+        exit_code, out, err = self.forward(['frobnicate'])
+
+        self.assertEqual(2, exit_code)
+        self.assertIn('invalid choice', err)
+        self.assertEqual([], self.executed)
+
+    def test_forward_returns_none_without_a_server(self):
+        self.assertEqual(None, server.forward(os.path.join(self.socket_dir, 'missing.sock'), ['start', 'web']))
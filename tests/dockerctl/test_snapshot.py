@@ -0,0 +1,105 @@
+from dockerctl.snapshot import ContainerSnapshot
+import unittest
+from mock import MagicMock
+
+
+class TestContainerSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.containers.return_value = [
+            {'Id': 1, 'Names': ['/web-happy_tesla'], 'Status': 'RUNNING'},
+            {'Id': 2, 'Names': ['/web-sad_bohr'], 'Status': 'EXITED'},
+            {'Id': 3, 'Names': ['/db-mad_curie', '/web-happy_tesla/db'], 'Status': 'RUNNING'},
+        ]
+        self.snapshot = ContainerSnapshot(self.client)
+
+    def test_containers_returns_only_running_containers_by_default(self):
+        self.snapshot.prefetch()
+
+        result = self.snapshot.containers('web')
+
+        self.assertEqual([c['Id'] for c in result], [1])
+
+    def test_containers_returns_exited_containers_if_requested(self):
+        self.snapshot.prefetch()
+
+        result = self.snapshot.containers('web', only_running=False)
+
+        self.assertEqual([c['Id'] for c in result], [1, 2])
+
+    def test_containers_ignores_link_names(self):
+        self.snapshot.prefetch()
+
+        result = self.snapshot.containers('db')
+
+        self.assertEqual([c['Id'] for c in result], [3])
+
+    def test_containers_lists_each_config_with_a_label_filter(self):
+        self.snapshot.containers('web', only_running=False)
+
+        self.client.containers.assert_called_once_with(all=True, filters={'label': 'dockerctl.config=web'})
+
+    def test_containers_pushes_the_status_filter_for_running_containers(self):
+        self.snapshot.containers('web')
+
+        self.client.containers.assert_called_once_with(
+            all=False, filters={'label': 'dockerctl.config=web', 'status': 'running'})
+
+    def test_containers_falls_back_to_a_name_filter_for_legacy_containers(self):
+        self.client.containers.side_effect = [[], self.client.containers.return_value]
+
+        result = self.snapshot.containers('web', only_running=False)
+
+        self.assertEqual([c['Id'] for c in result], [1, 2])
+        self.client.containers.assert_called_with(all=True, filters={'name': '^/?web-'})
+
+    def test_containers_uses_the_config_label_over_the_name(self):
+        self.client.containers.return_value = [
+            {'Id': 4, 'Names': ['/web-api-happy_tesla'], 'Labels': {'dockerctl.config': 'web'}, 'Status': 'RUNNING'},
+        ]
+        self.snapshot.prefetch()
+
+        self.assertEqual([c['Id'] for c in self.snapshot.containers('web')], [4])
+        self.assertEqual(self.snapshot.containers('web-api'), [])
+
+    def test_containers_lists_each_config_only_once(self):
+        self.snapshot.containers('web', only_running=False)
+        self.snapshot.containers('web')
+
+        self.assertEqual(self.client.containers.call_count, 1)
+
+    def test_prefetch_lists_all_containers_only_once(self):
+        self.snapshot.prefetch()
+        self.snapshot.containers('web')
+        self.snapshot.containers('db')
+        self.snapshot.containers('unknown')
+
+        self.client.containers.assert_called_once_with(all=True)
+
+    def test_invalidate_forces_a_new_listing(self):
+        self.snapshot.prefetch()
+        self.snapshot.invalidate()
+        self.snapshot.prefetch()
+
+        self.assertEqual(self.client.containers.call_count, 2)
+
+    def test_invalidating_a_config_keeps_the_listing_of_the_others(self):
+        self.snapshot.prefetch()
+        self.snapshot.invalidate('web')
+        self.client.containers.return_value = []
+
+        self.assertEqual([c['Id'] for c in self.snapshot.containers('db')], [3])
+        self.assertEqual(self.snapshot.containers('web'), [])
+        self.snapshot.containers('web')
+
+        # web is listed once more, by label and by name, as it had
+        # unlabelled containers
+        self.assertEqual(self.client.containers.call_count, 3)
+
+    def test_started_containers_are_added_without_a_new_listing(self):
+        self.snapshot.prefetch()
+        self.snapshot.started('db', {'Id': 4, 'Names': ['/db-sad_curie'], 'Status': 'RUNNING'})
+
+        self.assertEqual([c['Id'] for c in self.snapshot.containers('db')], [3, 4])
+        self.client.containers.assert_called_once_with(all=True)
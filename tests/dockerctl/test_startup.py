@@ -0,0 +1,49 @@
+import json
+import os
+import os.path
+import subprocess
+import sys
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# modules that must only be imported when a command really needs them
+HEAVY_MODULES = ('docker', 'requests', 'yaml', 'dockerctl.docker_py_client')
+# generous upper bound on the number of modules loaded, the python
+# interpreter alone loads about 40
+MODULE_BUDGET = 150
+
+STARTUP_SCRIPT = '''
+import json, sys
+from dockerctl import cli
+args = cli.build_parser().parse_args(sys.argv[1:])
+if args.use_cmdline_client:
+    cli.create_client(args)
+print json.dumps(sorted(sys.modules))
+'''
+
+
+class TestStartup(unittest.TestCase):
+
+    def loaded_modules(self, *argv):
+        output = subprocess.check_output([sys.executable, '-c', STARTUP_SCRIPT] + list(argv), cwd=ROOT_DIR)
+        return json.loads(output)
+
+    def assertLight(self, modules):
+        heavy = [name for name in HEAVY_MODULES if name in modules]
+        self.assertEqual([], heavy)
+        self.assertLessEqual(len(modules), MODULE_BUDGET)
+
+    def test_parsing_arguments_imports_no_backend(self):
+        self.assertLight(self.loaded_modules('status'))
+
+    def test_cmdline_client_does_not_import_docker(self):
+        self.assertLight(self.loaded_modules('-C', 'status'))
+
+    def test_help_imports_no_backend(self):
+        script = 'import sys\nfrom dockerctl import cli\ntry:\n    cli.main(["--help"])\nexcept SystemExit:\n    pass\n' \
+                 'sys.stderr.write(" ".join(sys.modules))'
+        process = subprocess.Popen([sys.executable, '-c', script], cwd=ROOT_DIR,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, err = process.communicate()
+        self.assertLight(err.split())
@@ -0,0 +1,76 @@
+from dockerctl.bulk import BulkOperation
+from dockerctl.container import Container
+from dockerctl.container_config import ContainerConfig
+from dockerctl.snapshot import ContainerSnapshot
+from dockerctl.state import StateStore
+from tests.benchmarks.fake_client import FakeDockerClient
+from tests.dockerctl.helpers import ConfigDirTestCase
+import os.path
+import shutil
+import tempfile
+import unittest
+
+
+class TestStateStore(unittest.TestCase):
+
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+        self.state = StateStore(os.path.join(self.state_dir, 'dockerctl'))
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir)
+
+    def test_put_and_get(self):
+        self.assertEqual(None, self.state.get('web'))
+
+        self.state.put('web', 'c1', 'web-happy_tesla', 'abc')
+
+        self.assertEqual({'Id': 'c1', 'Name': 'web-happy_tesla', 'ConfigHash': 'abc'}, self.state.get('web'))
+
+    def test_remove_only_removes_the_record_of_the_given_container(self):
+        self.state.put('web', 'c2', 'web-sad_bohr', 'abc')
+
+        self.state.remove('web', 'c1')
+        self.assertEqual('c2', self.state.get('web')['Id'])
+
+        self.state.remove('web', 'c2')
+        self.assertEqual(None, self.state.get('web'))
+
+
+class TestSnapshotWithState(ConfigDirTestCase):
+
+    def setUp(self):
+        ConfigDirTestCase.setUp(self)
+        self.write_config('web', 'image: image')
+
+        self.client = FakeDockerClient()
+        self.state = StateStore(os.path.join(self.config_dir, 'state'))
+        self.container_id = Container(ContainerConfig('web'), self.client, ContainerSnapshot(self.client, self.state)).start()
+        self.client.calls.clear()
+
+    def test_looks_up_the_recorded_container_with_one_inspect(self):
+        container = Container(ContainerConfig('web'), self.client, ContainerSnapshot(self.client, self.state))
+
+        self.assertEqual(self.container_id, container.get_runtime_id())
+        self.assertEqual({'inspect_container': 1}, dict(self.client.calls))
+
+    def test_lists_containers_if_the_record_is_stale(self):
+        self.client.stop(self.container_id)
+        self.client.calls.clear()
+        container = Container(ContainerConfig('web'), self.client, ContainerSnapshot(self.client, self.state))
+
+        self.assertEqual(None, container.get_runtime_id())
+        self.assertEqual(1, self.client.calls['inspect_container'])
+        self.assertTrue(self.client.calls['containers'])
+        self.assertEqual(None, self.state.get('web'))
+
+    def test_stop_forgets_the_container(self):
+        Container(ContainerConfig('web'), self.client, ContainerSnapshot(self.client, self.state)).stop()
+
+        self.assertEqual(None, self.state.get('web'))
+
+    def test_stopping_a_few_containers_uses_the_recorded_ids(self):
+        failures = BulkOperation(self.client, ContainerSnapshot(self.client, self.state)).stop(['web'])
+
+        self.assertEqual({}, failures)
+        self.assertEqual({'inspect_container': 1, 'stop': 1}, dict(self.client.calls))
@@ -0,0 +1,77 @@
+from dockerctl import stats
+from dockerctl.docker_cmdline_client import DockerCmdlineClient
+from dockerctl.snapshot import ContainerSnapshot
+from dockerctl.utils import stats_sample
+from tests.benchmarks.fake_client import FakeDockerClient
+from tests.dockerctl.helpers import ConfigDirTestCase, container
+import os.path
+import unittest
+
+
+class TestStats(ConfigDirTestCase):
+
+    def setUp(self):
+        ConfigDirTestCase.setUp(self)
+
+        self.client = FakeDockerClient([
+            container(1, 'web'),
+            container(2, 'web'),
+            container(3, 'web', 'EXITED'),
+            container(4, 'db'),
+        ])
+        self.collector = stats.StatsCollector(self.client, ContainerSnapshot(self.client), ['web', 'db', 'cache'])
+
+    def test_sums_up_the_running_containers_of_each_config(self):
+        self.collector.sample()
+        totals = self.collector.totals()
+
+        self.assertEqual(['cache', 'db', 'web'], totals.keys())
+        self.assertEqual(2, totals['web']['Containers'])
+        self.assertEqual(3.0, totals['web']['CPUPercent'])
+        self.assertEqual(128 * 1024 ** 2, totals['web']['MemoryUsage'])
+        self.assertEqual(0, totals['cache']['Containers'])
+        self.assertEqual(1, self.client.calls['containers'])
+        self.assertEqual(3, self.client.calls['stats'])
+
+    def test_writes_the_prometheus_text_file(self):
+        self.collector.sample()
+        path = os.path.join(self.config_dir, 'dockerctl.prom')
+
+        stats.write_textfile(path, stats.prometheus_text(self.collector.totals()))
+
+        with open(path) as fd:
+            lines = fd.read().splitlines()
+        self.assertIn('# TYPE dockerctl_network_receive_bytes_total counter', lines)
+        self.assertIn('dockerctl_network_receive_bytes_total{config="web"} 4000', lines)
+        self.assertIn('dockerctl_containers{config="cache"} 0', lines)
+        # no temporary files are left behind
+        self.assertEqual([], [f for f in os.listdir(self.config_dir) if f.startswith('.')])
+
+
+class TestStatsSamples(unittest.TestCase):
+
+    def test_stats_sample_from_the_api(self):
+        sample = stats_sample({
+            'cpu_stats':    {'cpu_usage': {'total_usage': 300, 'percpu_usage': [1, 2]}, 'system_cpu_usage': 2000},
+            'precpu_stats': {'cpu_usage': {'total_usage': 100}, 'system_cpu_usage': 1000},
+            'memory_stats': {'usage': 1000, 'limit': 4000, 'stats': {'cache': 200}},
+            'networks':     {'eth0': {'rx_bytes': 10, 'tx_bytes': 20}, 'eth1': {'rx_bytes': 1, 'tx_bytes': 2}},
+            'blkio_stats':  {'io_service_bytes_recursive': [{'op': 'Read', 'value': 5}, {'op': 'Write', 'value': 7}]},
+        })
+
+        self.assertEqual(40.0, sample['CPUPercent'])
+        self.assertEqual(800, sample['MemoryUsage'])
+        self.assertEqual((11, 22), (sample['NetworkRx'], sample['NetworkTx']))
+        self.assertEqual((5, 7), (sample['BlockRead'], sample['BlockWrite']))
+
+    def test_parse_docker_stats_output(self):
+        sample = DockerCmdlineClient()._parse_stats({
+            'CPUPerc':  '12.50%',
+            'MemUsage': '1.5MiB / 2GiB',
+            'NetIO':    '648B / 1.2kB',
+            'BlockIO':  '0B / 0B',
+        })
+
+        self.assertEqual(12.5, sample['CPUPercent'])
+        self.assertEqual((1572864, 2 * 1024 ** 3), (sample['MemoryUsage'], sample['MemoryLimit']))
+        self.assertEqual((648, 1200), (sample['NetworkRx'], sample['NetworkTx']))
@@ -0,0 +1,99 @@
+from dockerctl.container import Container
+from dockerctl.exceptions import ContainerException
+from dockerctl.snapshot import ContainerSnapshot
+from dockerctl.status import status_lines, status_reports
+from tests.benchmarks.fake_client import FakeDockerClient
+import json
+import unittest
+
+
+class Config(dict):
+
+    def __init__(self, name):
+        self.name = name
+
+
+class TestStatusLines(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeDockerClient([
+            {'Command': '/bin/web', 'Id': 'a' * 64, 'Image': 'web:1', 'Names': ['/web-happy_tesla'], 'Status': 'RUNNING'},
+            {'Command': '/bin/db', 'Id': 'b' * 64, 'Image': 'db:2', 'Names': ['/db-sad_bohr'], 'Status': 'EXITED'},
+        ])
+        snapshot = ContainerSnapshot(self.client)
+        snapshot.prefetch()
+        self.containers = [Container(Config(name), self.client, snapshot) for name in ('web', 'db', 'cache')]
+
+    def test_brief_only_needs_the_listing(self):
+        lines = list(status_lines(self.containers, brief=True))
+
+        self.assertEqual(['CONTAINER', 'STATE', 'ID', 'NAME'], lines[0].split())
+        self.assertEqual(['web', 'running', 'a' * 12, 'web-happy_tesla'], lines[1].split())
+        self.assertEqual(['db', 'exited', 'b' * 12, 'db-sad_bohr'], lines[2].split())
+        self.assertEqual(['cache', 'not', 'running'], lines[3].split())
+        self.assertEqual({'containers': 1}, dict(self.client.calls))
+
+    def test_inspects_running_containers_for_inspect_fields(self):
+        lines = list(status_lines(self.containers, 'container,ip'))
+
+        self.assertEqual(['web', '172.17.0.2'], lines[1].split())
+        self.assertEqual(1, self.client.calls['inspect_container'])
+
+    def test_json_has_one_object_per_line(self):
+        rows = [json.loads(line) for line in status_lines(self.containers, 'json')]
+
+        self.assertEqual(['web', 'db', 'cache'], [row['container'] for row in rows])
+        self.assertEqual(['127.0.0.1:8080 -> 80/tcp'], rows[0]['ports'])
+        self.assertEqual('', rows[1]['ip'])
+
+    def test_unknown_field(self):
+        self.assertRaises(ContainerException, list, status_lines(self.containers, 'container,colour'))
+
+    def test_container_removed_after_the_listing_is_not_running(self):
+        del self.client._containers['a' * 64]
+
+        lines = list(status_lines(self.containers, 'container,state,ip'))
+
+        self.assertEqual(['web', 'not', 'running'], lines[1].split())
+
+
+    def test_shows_the_most_recent_of_several_exited_containers(self):
+        self.client = FakeDockerClient([
+            {'Command': '/bin/db', 'Id': 'c' * 64, 'Image': 'db:2', 'Names': ['/db-mad_curie'],
+             'Created': 1400000002, 'Status': 'EXITED'},
+            {'Command': '/bin/db', 'Id': 'd' * 64, 'Image': 'db:1', 'Names': ['/db-sad_bohr'],
+             'Created': 1400000001, 'Status': 'EXITED'},
+        ])
+        containers = [Container(Config('db'), self.client, ContainerSnapshot(self.client))]
+
+        lines = list(status_lines(containers, brief=True))
+
+        self.assertEqual(['db', 'exited', 'c' * 12, 'db-mad_curie'], lines[1].split())
+
+
+class TestStatusReports(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeDockerClient([
+            {'Command': '/bin/web', 'Id': 'a' * 64, 'Image': 'web:1', 'Names': ['/web-happy_tesla'], 'Status': 'RUNNING'},
+            {'Command': '/bin/db', 'Id': 'b' * 64, 'Image': 'db:2', 'Names': ['/db-sad_bohr'], 'Status': 'RUNNING'},
+        ])
+        snapshot = ContainerSnapshot(self.client)
+        snapshot.prefetch()
+        self.containers = [Container(Config(name), self.client, snapshot) for name in ('web', 'db', 'cache')]
+
+    def test_reports_in_order_and_inspects_only_running_containers(self):
+        reports = list(status_reports(self.containers))
+
+        self.assertIn('Id:         %s' % ('a' * 64), reports[0])
+        self.assertIn('Id:         %s' % ('b' * 64), reports[1])
+        self.assertEqual('Container cache is not running\n', reports[2])
+        self.assertEqual({'containers': 1, 'inspect_container': 2}, dict(self.client.calls))
+
+    def test_container_removed_after_the_listing_is_not_running(self):
+        del self.client._containers['a' * 64]
+
+        reports = list(status_reports(self.containers))
+
+        self.assertEqual('Container web is not running\n', reports[0])
+        self.assertIn('Id:         %s' % ('b' * 64), reports[1])
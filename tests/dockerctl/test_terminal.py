@@ -0,0 +1,66 @@
+from dockerctl import terminal
+from mock import patch
+import os
+import socket
+import struct
+import tempfile
+import threading
+import unittest
+
+
+def frame(stream, data):
+    return struct.pack('>BxxxI', stream, len(data)) + data
+
+
+class TestTerminal(unittest.TestCase):
+
+    def test_split_frames_keeps_incomplete_frames(self):
+        data = frame(1, 'out\n') + frame(2, 'err\n')
+
+        frames, rest = terminal.split_frames(data[:-2])
+
+        self.assertEqual([(1, 'out\n')], frames)
+        self.assertEqual(data[len(frame(1, 'out\n')):-2], rest)
+
+    def test_pump_writes_frames_to_stdout_and_stderr(self):
+        local, remote = socket.socketpair()
+        remote.sendall(frame(1, 'out\n') + frame(2, 'err\n') + frame(1, 'more\n'))
+        remote.close()
+
+        with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+            with patch('sys.stdout', out), patch('sys.stderr', err):
+                terminal._pump(local, None, multiplexed=True)
+            out.seek(0)
+            err.seek(0)
+            self.assertEqual('out\nmore\n', out.read())
+            self.assertEqual('err\n', err.read())
+
+    def test_pump_forwards_input_and_closes_it_at_the_end(self):
+        local, remote = socket.socketpair()
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, 'ls\n')
+        os.close(write_fd)
+        remote.sendall('bin\n')
+
+        received = []
+
+        def recv_all():
+            # like a process, only exit after the end of the input
+            while True:
+                data = remote.recv(1024)
+                if not data:
+                    break
+                received.append(data)
+            remote.close()
+
+        thread = threading.Thread(target=recv_all)
+        thread.start()
+        with tempfile.TemporaryFile() as out:
+            with patch('sys.stdout', out):
+                terminal._pump(local, read_fd, multiplexed=False)
+            thread.join()
+            out.seek(0)
+            self.assertEqual('bin\n', out.read())
+
+        self.assertEqual('ls\n', ''.join(received))
+        os.close(read_fd)
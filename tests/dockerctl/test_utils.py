@@ -0,0 +1,57 @@
+from dockerctl.utils import atomic_write, parse_since
+import os
+import os.path
+import shutil
+import stat
+import tempfile
+import unittest
+
+
+class TestParseSince(unittest.TestCase):
+
+    def test_timestamps(self):
+        self.assertEqual(1398945600, parse_since('1398945600'))
+
+    def test_durations_relative_to_now(self):
+        now = 1398945600.5
+
+        self.assertEqual(1398945570, parse_since('30s', now))
+        self.assertEqual(1398945000, parse_since('10m', now))
+        self.assertEqual(1398938400, parse_since('2h', now))
+        self.assertEqual(1398859200, parse_since('1d', now))
+
+    def test_dates_and_datetimes_in_utc(self):
+        self.assertEqual(1398902400, parse_since('2014-05-01'))
+        self.assertEqual(1398947400, parse_since('2014-05-01T12:30:00'))
+        self.assertEqual(1398947400, parse_since('2014-05-01 12:30:00'))
+
+    def test_rejects_anything_else(self):
+        for since in ('yesterday', '10w', '-5m', '2014-05-01T12:30'):
+            self.assertRaises(ValueError, parse_since, since)
+
+
+class TestAtomicWrite(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_replaces_the_file(self):
+        path = os.path.join(self.dir, 'sub', 'state.json')
+
+        atomic_write(path, 'old')
+        atomic_write(path, 'new', 0644)
+
+        with open(path) as fd:
+            self.assertEqual('new', fd.read())
+        self.assertEqual(0644, stat.S_IMODE(os.stat(path).st_mode))
+        self.assertEqual(['state.json'], os.listdir(os.path.dirname(path)))
+
+    def test_leaves_no_temporary_file_behind_on_errors(self):
+        path = os.path.join(self.dir, 'state.json')
+        os.mkdir(path)
+
+        self.assertRaises(OSError, atomic_write, path, 'data')
+        self.assertEqual(['state.json'], os.listdir(self.dir))